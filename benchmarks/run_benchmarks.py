@@ -0,0 +1,399 @@
+"""CPU benchmark suite for file transcription, live streaming and entity extraction.
+
+Runs the samples in audio-samples/ through the bundled int8 tiny models and
+reports real-time factor, latency percentiles, peak RSS and word error rate,
+then compares them with benchmarks/baseline.json.
+
+Usage:
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --live-speed 4 --repeats 5
+    python -m benchmarks.run_benchmarks --save-baseline
+    python -m benchmarks.run_benchmarks --check   # exit 1 on regressions
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from logic import tracing
+from logic.tracing import percentile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SAMPLES_DIR = os.path.join(REPO_ROOT, "audio-samples")
+REFERENCES_FILE = os.path.join(BENCH_DIR, "references.json")
+BASELINE_FILE = os.path.join(BENCH_DIR, "baseline.json")
+SAMPLE_RATE = 16000
+
+# Relative increase over the baseline reported as a regression
+DEFAULT_TOLERANCE = 0.10
+
+ENTITY_TEXTS = [
+    "Machine M1234 is down, please report it",
+    "check the status of order 45871",
+    "assign order 3321 to EMP102",
+    "show details for machine id M77",
+    "the conveyor on line 6 has a hydraulic problem since this morning",
+    "find employee id EMP4411 and give him order 90210",
+]
+
+
+def normalize_words(text):
+    """Lowercase and strip punctuation for WER scoring."""
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+
+def word_error_rate(reference, hypothesis):
+    """Word-level Levenshtein distance divided by the reference length."""
+    ref = normalize_words(reference)
+    hyp = normalize_words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word),
+            )
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def peak_rss_mb():
+    """Return the process's peak resident set size in MB, or None if unknown."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Bytes on macOS, kilobytes elsewhere
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        pass
+
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD),
+                ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return counters.PeakWorkingSetSize / (1024 * 1024)
+    except (AttributeError, OSError):
+        pass
+    return None
+
+
+def latency_stats(seconds):
+    """p50/p95/p99 in milliseconds of a list of durations in seconds."""
+    ms = [value * 1000 for value in seconds]
+    return {
+        "p50_ms": percentile(ms, 50),
+        "p95_ms": percentile(ms, 95),
+        "p99_ms": percentile(ms, 99),
+    }
+
+
+def load_audio(path):
+    """Decode a sample to 16 kHz mono float32, as the models expect."""
+    from faster_whisper import decode_audio
+    return decode_audio(path, sampling_rate=SAMPLE_RATE)
+
+
+def model_dir(name):
+    return os.path.join(REPO_ROOT, name)
+
+
+def bench_file(sample, spec, repeats):
+    """Transcribe a file like the app does: cold run, then warm repeats."""
+    from logic.whisper_service import WhisperService
+
+    path = os.path.join(SAMPLES_DIR, sample)
+    audio_seconds = len(load_audio(path)) / SAMPLE_RATE
+    errors = []
+    service = WhisperService(
+        on_status_update=lambda status: None,
+        on_result=lambda text: None,
+        on_error=errors.append,
+        on_complete=lambda: None,
+        cache=False,
+    )
+
+    def run():
+        start = time.perf_counter()
+        segments = list(service.iter_segments(
+            path,
+            model_dir(spec["model"]),
+            "cpu",
+            use_vad=True,
+            language=spec.get("language"),
+        ))
+        return time.perf_counter() - start, " ".join(segment["text"].strip() for segment in segments)
+
+    cold_s, text = run()
+    warm = [run()[0] for _ in range(repeats)]
+
+    result = {
+        "audio_seconds": audio_seconds,
+        "cold_s": cold_s,
+        "rtf": percentile([duration / audio_seconds for duration in warm], 50),
+        **latency_stats(warm),
+        "text": text,
+    }
+    if spec.get("reference"):
+        result["wer"] = word_error_rate(spec["reference"], text)
+    return result
+
+
+def bench_live(sample, spec, speed):
+    """Replay a sample through the live pipeline at speed x real time.
+
+    Args:
+        sample: File name in audio-samples/
+        spec: Reference entry with model and language
+        speed: Playback speed (1.0 = real time, 0 = as fast as possible)
+    """
+    from logic.audio_sources import WavReplaySource
+    from logic.live_transcription import BlockSize, EndBlocks, LiveTranscription
+
+    audio = load_audio(os.path.join(SAMPLES_DIR, sample))
+    texts = []
+    errors = []
+    live = LiveTranscription(
+        on_transcription=lambda text: texts.append((time.perf_counter(), text)),
+        on_status_update=lambda status: None,
+        on_error=errors.append,
+        model_path=model_dir(spec["model"]),
+        compute_type="int8",
+        language=spec.get("language"),
+    )
+    # Trailing silence long enough for the last utterance to be closed and queued
+    source = WavReplaySource(audio, speed=speed, trailing_silence=(EndBlocks + 2) * BlockSize / 1000)
+    if not live.start(source=source):
+        raise RuntimeError(errors[-1] if errors else "LiveTranscription failed to start")
+
+    source.wait()
+    fed = source.finished_at
+
+    # Wait for the decoder to drain; done once nothing new arrives for a while
+    deadline = fed + 60
+    idle_since = time.perf_counter()
+    seen = 0
+    while time.perf_counter() < deadline:
+        if len(texts) != seen:
+            seen = len(texts)
+            idle_since = time.perf_counter()
+        if live.utterances.stats()["depth"] == 0 and time.perf_counter() - idle_since > 2.0:
+            break
+        time.sleep(0.05)
+    live.stop()
+
+    stats = live.get_stats()
+    result = {
+        "audio_seconds": len(audio) / SAMPLE_RATE,
+        "speed": speed,
+        "utterances": len(texts),
+        "finish_lag_s": max(0.0, texts[-1][0] - fed) if texts else None,
+        "dropped_seconds": stats.get("dropped_seconds", 0.0),
+        "text": " ".join(text.strip() for _, text in texts),
+    }
+    decode = tracing.get_tracer().summary().get("live.decode")
+    if decode:
+        result.update({
+            "rtf": decode.get("rtf_p50"),
+            "p50_ms": decode["p50_ms"],
+            "p95_ms": decode["p95_ms"],
+            "p99_ms": decode["p99_ms"],
+        })
+    if spec.get("reference"):
+        result["wer"] = word_error_rate(spec["reference"], result["text"])
+    if errors:
+        result["errors"] = errors
+    return result
+
+
+def bench_entities(iterations):
+    """Time the single-pass extractor (and spaCy preprocessing when installed)."""
+    from logic.entity_extractor import EntityExtractor
+
+    extractor = EntityExtractor()
+    extract_times = []
+    for _ in range(iterations):
+        for text in ENTITY_TEXTS:
+            start = time.perf_counter()
+            extractor.extract(text)
+            extract_times.append(time.perf_counter() - start)
+
+    result = {"calls": len(extract_times), **latency_stats(extract_times)}
+
+    try:
+        preprocess_times = []
+        for _ in range(iterations):
+            for text in ENTITY_TEXTS:
+                start = time.perf_counter()
+                extractor.preprocess(text)
+                preprocess_times.append(time.perf_counter() - start)
+        result["preprocess"] = latency_stats(preprocess_times)
+    except Exception as e:
+        result["preprocess"] = {"skipped": str(e)}
+    return result
+
+
+def bench_corrections(iterations):
+    """Time the correction engine on the raw transcripts of corrections.json."""
+    from logic.correction_engine import CorrectionEngine
+
+    corrections_path = os.path.join(REPO_ROOT, "corrections.json")
+    engine = CorrectionEngine.from_files(corrections_path, os.path.join(REPO_ROOT, "correction_terms.txt"))
+    with open(corrections_path, "r", encoding="utf-8") as f:
+        texts = list(json.load(f)) + ENTITY_TEXTS
+    times = []
+    for _ in range(iterations):
+        for text in texts:
+            start = time.perf_counter()
+            engine.correct(text)
+            times.append(time.perf_counter() - start)
+    return {"calls": len(times), "phrases": len(engine.phrases), "terms": len(engine.terms), **latency_stats(times)}
+
+
+def run_scenario(name, func, *args):
+    """Run one scenario with fresh tracer statistics, never aborting the suite."""
+    tracing.get_tracer().reset()
+    print(f"Running {name}...", flush=True)
+    try:
+        result = func(*args)
+    except Exception as e:
+        print(f"  failed: {e}")
+        return {"error": str(e)}
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def flatten_metrics(results):
+    """Map 'scenario.metric' to numeric values; lower is better for all of them."""
+    metrics = {}
+    for scenario, result in results["scenarios"].items():
+        for key in ("rtf", "p50_ms", "p95_ms", "p99_ms", "cold_s", "wer", "finish_lag_s", "peak_rss_mb"):
+            value = result.get(key)
+            if isinstance(value, (int, float)):
+                metrics[f"{scenario}.{key}"] = value
+    return metrics
+
+
+def compare(results, baseline, tolerance):
+    """Print a comparison table and return the regressed metric names."""
+    current = flatten_metrics(results)
+    previous = flatten_metrics(baseline)
+    regressions = []
+    print(f"\n{'metric':<40}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name in sorted(current):
+        value = current[name]
+        if name not in previous:
+            print(f"{name:<40}{'-':>12}{value:>12.3f}{'new':>10}")
+            continue
+        old = previous[name]
+        change = (value - old) / old if old else 0.0
+        flag = ""
+        if change > tolerance and value - old > 1e-3:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<40}{old:>12.3f}{value:>12.3f}{change:>+10.1%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark transcription and extraction on CPU.")
+    parser.add_argument("--repeats", type=int, default=3, help="Warm file transcription runs per sample")
+    parser.add_argument("--live-speed", type=float, default=1.0, help="Live replay speed (1 = real time, 0 = unthrottled)")
+    parser.add_argument("--entity-iterations", type=int, default=200)
+    parser.add_argument("--skip", action="append", default=[], choices=["file", "live", "entities", "corrections"])
+    parser.add_argument("--output", help="Also write the results JSON here")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--check", action="store_true", help="Exit with status 1 when a metric regressed")
+    args = parser.parse_args(argv)
+
+    # In-memory spans only; the suite reads the live decode percentiles from them
+    tracing.enable(path=None)
+
+    with open(REFERENCES_FILE, "r", encoding="utf-8") as f:
+        references = json.load(f)
+
+    import ctranslate2
+    results = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "machine": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "ctranslate2": ctranslate2.__version__,
+        },
+        "scenarios": {},
+    }
+    scenarios = results["scenarios"]
+
+    for sample, spec in references.items():
+        name = os.path.splitext(sample)[0]
+        if "file" not in args.skip:
+            scenarios[f"file.{name}"] = run_scenario(f"file transcription of {sample}", bench_file, sample, spec, args.repeats)
+        if "live" not in args.skip:
+            scenarios[f"live.{name}"] = run_scenario(f"live replay of {sample}", bench_live, sample, spec, args.live_speed)
+    if "entities" not in args.skip:
+        scenarios["entities"] = run_scenario("entity extraction", bench_entities, args.entity_iterations)
+    if "corrections" not in args.skip:
+        scenarios["corrections"] = run_scenario("segment correction", bench_corrections, args.entity_iterations)
+
+    for scenario, result in scenarios.items():
+        summary = ", ".join(
+            f"{key}={value:.3f}" for key, value in result.items()
+            if isinstance(value, float)
+        )
+        print(f"{scenario}: {summary or result.get('error', '')}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+    regressions = []
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\nBaseline written to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) regressed by more than {args.tolerance:.0%}")
+    else:
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one")
+
+    return 1 if args.check and regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""Aho-Corasick automaton for matching many keywords in one pass."""
+from collections import deque
+from typing import Any, Iterable, Iterator, Tuple
+
+
+class AhoCorasick:
+    """Multi-pattern matcher over sequences of symbols.
+
+    Patterns are usually strings (matched character by character) but any
+    sequence of hashable symbols works, e.g. a list of tokens. The text is
+    scanned once regardless of how many patterns are registered.
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[Any, Any]] = ()):
+        """Build an automaton.
+
+        Args:
+            patterns: Iterable of (pattern, value) pairs; value is reported
+                with every match of pattern
+        """
+        self._goto = [{}]
+        self._fail = [0]
+        self._own = [[]]
+        self._out = [[]]
+        self._built = False
+        for pattern, value in patterns:
+            self.add(pattern, value)
+        self.build()
+
+    def __len__(self):
+        return sum(len(own) for own in self._own)
+
+    def add(self, pattern, value=None):
+        """Register a pattern; call build() before matching again."""
+        if not pattern:
+            return
+        node = 0
+        for symbol in pattern:
+            nxt = self._goto[node].get(symbol)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][symbol] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._own.append([])
+            node = nxt
+        self._own[node].append((len(pattern), value))
+        self._built = False
+
+    def build(self):
+        """Compute failure links (breadth-first) and merge outputs."""
+        self._out = [list(own) for own in self._own]
+        queue = deque(self._goto[0].values())
+        for node in queue:
+            self._fail[node] = 0
+        while queue:
+            node = queue.popleft()
+            for symbol, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and symbol not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(symbol, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._own[child] + self._out[self._fail[child]]
+        self._built = True
+
+    def iter_matches(self, text) -> Iterator[Tuple[int, int, Any]]:
+        """Yield (start, end, value) for every pattern occurrence in text.
+
+        Overlapping occurrences are all reported, ordered by end position.
+        """
+        if not self._built:
+            self.build()
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        node = 0
+        for i, symbol in enumerate(text):
+            while node and symbol not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(symbol, 0)
+            for length, value in out[node]:
+                yield i + 1 - length, i + 1, value
@@ -10,14 +10,16 @@ from ui.transcription_ui import (
     create_model_section
 )
 from ui.clipboard_history_ui import create_history_dialog
+from ui.update_scheduler import UpdateScheduler
 from logic.whisper_service import WhisperService
 from logic.audio_recorder import AudioRecorder
 from logic.clipboard_history import ClipboardHistory
-from logic.live_transcription import LiveTranscription
 from logic.entity_extractor import EntityExtractor
-from ui.transcription_ui import create_transcription_display
+from logic.postprocessing import PostProcessingPipeline
+from logic.nlp import warm_up as warm_up_nlp
+from logic.startup_profiler import get_profiler
+from ui.transcription_ui import DISPLAY_TAIL_CHARS, create_transcription_display
 import threading
-import time
 
 def configure_page(page):
     """Configure the Flet page with theme, title, and window settings."""
@@ -35,39 +37,64 @@ def configure_page(page):
 
 class WhisperApp:
     def __init__(self, page: ft.Page):
+        profiler = get_profiler()
         try:
             self.page = page
             configure_page(page)
+            # Worker-thread callbacks push through this at most once per frame
+            self.ui_updates = UpdateScheduler(page)
             
             self.file_picker = ft.FilePicker()
             self.page.overlay.append(self.file_picker)
             
             self.header = create_header()
             
-            self.clipboard_history = ClipboardHistory()
+            with profiler.span("ClipboardHistory"):
+                self.clipboard_history = ClipboardHistory()
             
-            self.model_selector = ModelSelector(page, self.on_model_change)
+            with profiler.span("ModelSelector"):
+                self.model_selector = ModelSelector(page, self.on_model_change)
             
             def on_recorder_status(status):
                 if "error" in status.lower() or "failed" in status.lower():
                     self.status_text.value = status
                     self.status_text.color = AppThemeLang.ERROR_COLOR
-                    if self.status_text and self.page:
-                        self.page.update()
-                elif "saved" in status:
-                    self.status_text.value = "Recording saved"
+                    self.ui_updates.request(self.status_text)
+                elif "saved" in status or "finished" in status:
+                    self.status_text.value = status
                     self.status_text.color = AppThemeLang.SUCCESS_COLOR
-                    if self.status_text and self.page:
-                        self.page.update()
+                    self.ui_updates.request(self.status_text)
+            
+            with profiler.span("AudioRecorder"):
+                self.audio_recorder = AudioRecorder(on_status_update=on_recorder_status)
             
-            self.audio_recorder = AudioRecorder(on_status_update=on_recorder_status)
+            self.recording_session = None
+            self.recorded_audio = None
             
             def start_recording(_):
                 self.record_button.visible = False
                 self.stop_button.visible = True
                 self.selected_file_path.value = ""
+                self.recorded_audio = None
                 self.selected_file_name.value = "Recording..."
                 self.transcribe_button.disabled = True
+                
+                model_name = self.model_selector.get_model_name()
+                if self.pipeline_checkbox.value and model_name:
+                    self.result_text.value = ""
+                    self.copy_button.visible = False
+                    task = "translate" if self.translate_checkbox.value else "transcribe"
+                    self.recording_session = self.whisper_service.start_recording_session(
+                        model_name=model_name,
+                        device=self.model_selector.device_dropdown.value,
+                        use_vad=self.vad_checkbox.value,
+                        language=self.model_selector.language_dropdown.value,
+                        task=task,
+                        sample_rate=self.audio_recorder.sample_rate
+                    )
+                    self.audio_recorder.on_audio_block = self.recording_session.feed
+                
+                self.audio_recorder.keep_file = self.keep_recording_checkbox.value
                 self.audio_recorder.start_recording()
                 if self.page:
                     self.page.update()
@@ -75,69 +102,93 @@ class WhisperApp:
             def stop_recording(_):
                 self.record_button.visible = True
                 self.stop_button.visible = False
-                file_path = self.audio_recorder.stop_recording()
-                if file_path:
-                    self.selected_file_path.value = file_path
+                recording = self.audio_recorder.stop_recording()
+                self.audio_recorder.on_audio_block = None
+                if self.recording_session:
+                    if recording is not None:
+                        # Only the last partial window is left to decode
+                        self.progress_ring.visible = True
+                        self.recording_session.finish()
+                    else:
+                        self.recording_session.cancel()
+                    self.recording_session = None
+                if isinstance(recording, str):
+                    self.selected_file_path.value = recording
                     self.selected_file_name.value = "Recorded Audio"
                     self.update_ui_state()
+                elif recording is not None:
+                    # Kept in memory and passed to the model as an array
+                    self.recorded_audio = recording
+                    self.selected_file_name.value = "Recorded Audio (in memory)"
+                    self.update_ui_state()
                 else:
                     self.selected_file_name.value = "No file selected"
                 if self.page:
                     self.page.update()
             
-            self.file_section, self.selected_file_path, self.selected_file_name, self.record_button, self.stop_button, self.select_file_button = create_file_section(
+            def on_file_selected():
+                self.recorded_audio = None
+                self.update_ui_state()
+            
+            self.file_section, self.selected_file_path, self.selected_file_name, self.record_button, self.stop_button, self.select_file_button, self.keep_recording_checkbox = create_file_section(
                 self.file_picker, 
-                lambda: self.update_ui_state(),
+                on_file_selected,
                 start_recording,
                 stop_recording
             )
             
             self.model_section, self.vram_card, self.speed_card = create_model_section(self.model_selector)
             
-            self.results_section, self.result_text, self.copy_button, self.history_button = create_result_section()
+            self.results_section, self.result_text, self.copy_button, self.history_button = create_result_section(self.ui_updates.request)
+            
+            self.controls_section, self.transcribe_button, self.progress_ring, self.status_text, self.vad_checkbox, self.translate_checkbox, self.live_button, self.pipeline_checkbox = create_controls_section()
+            
+            with profiler.span("EntityExtractor"):
+                self.entity_extractor = EntityExtractor()
+            self.transcription_display, self.update_display = create_transcription_display(self.entity_extractor, self.ui_updates.request)
             
-            self.controls_section, self.transcribe_button, self.progress_ring, self.status_text, self.vad_checkbox, self.translate_checkbox, self.live_button = create_controls_section()
+            def on_postprocessed(item):
+                # Runs on the last stage's worker thread, after the segment is already shown
+                if self.update_display and self.transcription_display:
+                    self.update_display(self.result_text.tail(DISPLAY_TAIL_CHARS), item)
             
-            self.entity_extractor = EntityExtractor()
-            self.transcription_display, self.update_display = create_transcription_display(ft.Text())
+            try:
+                self.postprocessing = PostProcessingPipeline.from_config(
+                    extractor=self.entity_extractor,
+                    on_result=on_postprocessed,
+                ).start()
+            except (OSError, ValueError, TypeError, KeyError) as e:
+                print(f"Invalid post-processing configuration, using defaults: {e}")
+                self.postprocessing = PostProcessingPipeline.from_config(
+                    None,
+                    extractor=self.entity_extractor,
+                    on_result=on_postprocessed,
+                ).start()
             
             self.live_transcription = None
             self.is_live_active = False
-            self.live_accumulated_text = ""
-            self.transcription_buffer = []
-            self.last_update_time = time.time()
             
             def on_live_transcription(text):
                 if not text or not isinstance(text, str):
                     print("Invalid transcription data:", text)
                     return
                 print(f"Received transcription: {text}")
-                self.transcription_buffer.append(text)
-                current_time = time.time()
-                if current_time - self.last_update_time >= 2.0 or len(self.transcription_buffer) > 5:
-                    accumulated_text = " ".join(self.transcription_buffer).strip()
-                    if accumulated_text:
-                        self.result_text.value = accumulated_text  # Reset to avoid duplication
-                        self.copy_button.visible = bool(self.result_text.value)
-                        self.live_accumulated_text = accumulated_text
-                        try:
-                            result = self.entity_extractor.process(accumulated_text)
-                            display_text = f"{accumulated_text}\nEntities: {result['entities']}, Intent: {result['intent']}"
-                            if self.update_display and self.transcription_display:
-                                self.update_display(display_text)
-                            print(f"Logged: Entities={result['entities']}, Intent={result['intent']}")
-                        except AttributeError as e:
-                            print(f"Entity extraction error: {e}")
-                            display_text = f"{accumulated_text}\nEntities: {{}}, Intent: unknown"
-                            if self.update_display and self.transcription_display:
-                                self.update_display(display_text)
-                        self.transcription_buffer = []
-                        self.last_update_time = current_time
-                    if self.page:
-                        self.page.update()
+                # Each utterance becomes a committed segment; earlier ones stay as they are
+                self.result_text.append(text)
+                self.copy_button.visible = bool(self.result_text.segments)
+                self.ui_updates.request(self.copy_button)
+                
+                # Correction, extraction and export run on the pipeline's workers
+                self.postprocessing.submit(text)
             
             self.on_live_transcription = on_live_transcription
             
+            def on_live_partial(stable, unstable):
+                self.result_text.set_interim(" ".join(part for part in (stable, unstable) if part))
+                if not self.copy_button.visible:
+                    self.copy_button.visible = True
+                    self.ui_updates.request(self.copy_button)
+            
             def on_live_status(status):
                 self.status_text.value = status
                 if "error" in status.lower() or "failed" in status.lower():
@@ -152,18 +203,19 @@ class WhisperApp:
                     self.live_button.icon = ft.icons.MIC_NONE
                 else:
                     self.status_text.color = AppThemeLang.WARNING_COLOR
-                if self.status_text and self.page:
-                    self.page.update()
+                self.ui_updates.request(self.status_text, self.live_button)
             
             def on_live_error(error):
                 self.status_text.value = f"Error: {error}"
                 self.status_text.color = AppThemeLang.ERROR_COLOR
                 self.live_button.text = "Start Live"
                 self.live_button.icon = ft.icons.MIC_NONE
-                if self.status_text and self.page:
-                    self.page.update()
+                self.ui_updates.request(self.status_text, self.live_button)
             
             def toggle_live_transcription(_):
+                # Deferred: pulls in numpy and sounddevice
+                from logic.live_transcription import LiveTranscription
+                
                 if not LiveTranscription.is_available():
                     self.status_text.value = "Error: sounddevice library not available"
                     self.status_text.color = AppThemeLang.ERROR_COLOR
@@ -197,17 +249,15 @@ class WhisperApp:
                     self.translate_checkbox.disabled = False
                     self.translate_checkbox.visible = self.model_selector.model_type.value == "multilingual"
                     
-                    if self.live_accumulated_text.strip():
+                    live_text = self.result_text.committed_text
+                    if live_text.strip():
                         model_name = self.model_selector.get_model_name() or ""
-                        self.clipboard_history.add_item(self.live_accumulated_text, model_name)
-                        self.live_accumulated_text = ""
+                        self.clipboard_history.add_item(live_text, model_name)
                 else:
-                    self.result_text.value = ""
-                    self.live_accumulated_text = ""
+                    self.result_text.clear()
+                    self.postprocessing.reset()
                     self.copy_button.visible = False
                     self.progress_ring.visible = True
-                    self.transcription_buffer = []
-                    self.last_update_time = time.time()
                     
                     task = "translate" if self.translate_checkbox.value else "transcribe"
                     language = self.model_selector.language_dropdown.value if self.model_selector.language_dropdown.value != "auto" else "en"
@@ -224,6 +274,9 @@ class WhisperApp:
                         task=task,
                         compute_type=compute_type,
                         vad_filter=self.vad_checkbox.value,
+                        vad_backend="silero" if self.vad_checkbox.value else "fft",
+                        streaming=True,
+                        on_partial=on_live_partial,
                     )
                     
                     success = self.live_transcription.start()
@@ -286,31 +339,37 @@ class WhisperApp:
                     self.status_text.color = AppThemeLang.WARNING_COLOR
                 elif status == "Transcription complete!":
                     self.status_text.color = AppThemeLang.SUCCESS_COLOR
-                if self.status_text and self.page:
-                    self.page.update()
+                self.ui_updates.request(self.status_text)
+            
+            def on_segment(segment):
+                text = segment["text"].strip()
+                if not text:
+                    return
+                self.result_text.append(text)
+                self.copy_button.visible = True
+                self.ui_updates.request(self.copy_button)
             
             def on_result(text):
-                self.result_text.value = text
+                # Segments were already streamed in; only fill the view if they were not
+                if not self.result_text.segments:
+                    self.result_text.value = text
                 self.copy_button.visible = bool(text)
                 
                 if text.strip():
                     model_name = self.model_selector.get_model_name() or ""
                     self.clipboard_history.add_item(text, model_name)
                     
-                if self.page:
-                    self.page.update()
+                self.ui_updates.request(self.copy_button)
             
             def on_error(error):
                 self.result_text.value = f"Error: {error}"
                 self.status_text.value = "Error occurred"
                 self.status_text.color = AppThemeLang.ERROR_COLOR
-                if self.page:
-                    self.page.update()
+                self.ui_updates.request(self.status_text)
             
             def on_complete():
                 self.progress_ring.visible = False
-                if self.page:
-                    self.page.update()
+                self.ui_updates.request(self.progress_ring)
             
             def copy_to_clipboard(_):
                 text = self.result_text.value
@@ -334,15 +393,17 @@ class WhisperApp:
             
             self.copy_button.on_click = copy_to_clipboard
             
-            self.whisper_service = WhisperService(
-                on_status_update=on_status_update,
-                on_result=on_result,
-                on_error=on_error,
-                on_complete=on_complete
-            )
+            with profiler.span("WhisperService"):
+                self.whisper_service = WhisperService(
+                    on_status_update=on_status_update,
+                    on_result=on_result,
+                    on_error=on_error,
+                    on_complete=on_complete,
+                    on_segment=on_segment
+                )
             
             def start_transcription(_):
-                if not self.selected_file_path.value:
+                if not self.selected_file_path.value and self.recorded_audio is None:
                     self.status_text.value = "Please select an audio file first"
                     self.status_text.color = AppThemeLang.ERROR_COLOR
                     if self.status_text and self.page:
@@ -367,7 +428,7 @@ class WhisperApp:
                 task = "translate" if self.translate_checkbox.value else "transcribe"
                 
                 self.whisper_service.transcribe(
-                    file_path=self.selected_file_path.value,
+                    file_path=self.recorded_audio if self.recorded_audio is not None else self.selected_file_path.value,
                     model_name=model_name,
                     device=self.model_selector.device_dropdown.value,
                     use_vad=self.vad_checkbox.value,
@@ -393,6 +454,11 @@ class WhisperApp:
             )
             
             self.update_ui_state()
+            profiler.mark("first_frame")
+            profiler.write_report()
+            
+            # Load spaCy only once the window is up
+            warm_up_nlp()
 
         except Exception as e:
             print("Fatal error in WhisperApp init:", e)
@@ -402,7 +468,7 @@ class WhisperApp:
     def update_ui_state(self):
         """Update UI elements based on current model and file selection."""
         is_valid_model = self.model_selector.is_valid_model()
-        has_file = bool(self.selected_file_path.value)
+        has_file = bool(self.selected_file_path.value) or self.recorded_audio is not None
         
         self.transcribe_button.disabled = not is_valid_model or not has_file or self.is_live_active
         
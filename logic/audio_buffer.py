@@ -0,0 +1,85 @@
+"""Preallocated ring buffer for real-time audio capture."""
+import numpy as np
+
+
+class AudioRingBuffer:
+    """Single-producer ring buffer of float32 mono samples.
+
+    The backing array holds every sample twice (at i and i + capacity), so
+    any window of up to `capacity` samples is one contiguous slice and can be
+    handed out as a zero-copy view. Writing never allocates, which keeps it
+    safe to call from the PortAudio callback.
+
+    Positions are absolute sample counts since the last reset. A view of
+    [start, end) stays valid until `capacity` more samples have been written
+    after `start`; `is_valid` tells the reader whether that has happened.
+    """
+
+    def __init__(self, capacity: int):
+        """Allocate the buffer.
+
+        Args:
+            capacity: Number of samples the buffer can hold
+        """
+        self.capacity = int(capacity)
+        self._data = np.zeros(2 * self.capacity, dtype=np.float32)
+        self._written = 0
+
+    @property
+    def position(self):
+        """Absolute position of the next sample to be written."""
+        return self._written
+
+    def reset(self):
+        """Forget all written samples."""
+        self._written = 0
+
+    def write(self, samples):
+        """Append samples, overwriting the oldest ones when full.
+
+        Args:
+            samples: 1-D array of samples
+        """
+        n = len(samples)
+        if n > self.capacity:
+            self._written += n - self.capacity
+            samples = samples[-self.capacity:]
+            n = self.capacity
+
+        cap = self.capacity
+        i = self._written % cap
+        first = min(n, cap - i)
+        self._data[i:i + first] = samples[:first]
+        self._data[i + cap:i + cap + first] = samples[:first]
+
+        rest = n - first
+        if rest:
+            self._data[:rest] = samples[first:]
+            self._data[cap:cap + rest] = samples[first:]
+
+        self._written += n
+
+    def is_valid(self, start):
+        """Check whether samples from `start` onwards have not been overwritten."""
+        return self._written - start <= self.capacity
+
+    def view(self, start, end):
+        """Return a zero-copy view of the samples in [start, end).
+
+        Args:
+            start: Absolute start position
+            end: Absolute end position (exclusive)
+
+        Returns:
+            Read-only 1-D float32 array view
+        """
+        length = end - start
+        if length < 0 or length > self.capacity:
+            raise ValueError(f"Window of {length} samples does not fit in ring of {self.capacity}")
+        if not self.is_valid(start):
+            raise ValueError("Requested samples have already been overwritten")
+
+        offset = start % self.capacity
+        window = self._data[offset:offset + length]
+        window.flags.writeable = False
+        return window
@@ -1,93 +1,262 @@
 """Audio recording functionality using sounddevice."""
 import os
+import queue
 import tempfile
-import sounddevice as sd
-import soundfile as sf
-import numpy as np
 import threading
 
+# file_format -> (soundfile format, subtype, file extension)
+FILE_FORMATS = {
+    "wav": ("WAV", "PCM_16", ".wav"),
+    "flac": ("FLAC", "PCM_16", ".flac"),
+    "opus": ("OGG", "OPUS", ".ogg"),
+}
+
+class _MemorySink:
+    """Growable float32 buffer with the write() interface of a SoundFile.
+
+    Capacity doubles when full, so appending blocks is amortized O(1) and
+    the recording is held once, ready to be passed to the model.
+    """
+
+    def __init__(self, sample_rate, initial_seconds=30):
+        # Imported here so numpy stays off the app's startup import chain
+        import numpy as np
+
+        self._np = np
+        self._buffer = np.empty(int(sample_rate * initial_seconds), dtype=np.float32)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def write(self, block):
+        samples = block[:, 0] if block.ndim > 1 else block
+        end = self._size + len(samples)
+        if end > len(self._buffer):
+            grown = self._np.empty(max(end, 2 * len(self._buffer)), dtype=self._np.float32)
+            grown[:self._size] = self._buffer[:self._size]
+            self._buffer = grown
+        self._buffer[self._size:end] = samples
+        self._size = end
+
+    @property
+    def audio(self):
+        """Recorded samples so far (a view, not a copy)."""
+        return self._buffer[:self._size]
+
+
 class AudioRecorder:
-    """Records audio from the microphone and saves it to a file."""
-    
-    def __init__(self, on_status_update=None):
+    """Records audio from the microphone into a file or into memory."""
+
+    def __init__(self, on_status_update=None, file_format="wav", on_audio_block=None, keep_file=True, max_memory_seconds=600):
         """Initialize the recorder.
-        
+
         Args:
             on_status_update: Callback for status updates
+            file_format: Output format, one of FILE_FORMATS ('wav', 'flac', 'opus')
+            on_audio_block: Callback receiving each recorded block after it
+                was written, e.g. to transcribe while recording
+            keep_file: Stream the recording into a file; when False it is
+                kept in memory and can be written later with save()
+            max_memory_seconds: Longest recording kept in memory; beyond it
+                an in-memory recording is moved to a temp file and streamed
+                from there on, so memory use stays bounded
         """
+        if file_format not in FILE_FORMATS:
+            raise ValueError(f"Unsupported recording format '{file_format}', expected one of {list(FILE_FORMATS)}")
+
         self.sample_rate = 16000
         self.channels = 1
+        self.file_format = file_format
         self.is_recording = False
         self.recording_thread = None
-        self.recorded_data = []
+        self.frames_written = 0
         self.on_status_update = on_status_update
+        self.on_audio_block = on_audio_block
+        self.keep_file = keep_file
+        self.max_memory_seconds = max_memory_seconds
         self.temp_file = None
-    
+        self.audio = None
+        self._blocks = queue.Queue()
+        self._output_file = None
+        self._sink = None
+        self._target = None
+        self._error = None
+
     def start_recording(self):
         """Start recording audio from the microphone."""
         if self.is_recording:
             return
-        
+
         self.is_recording = True
-        self.recorded_data = []
-        
+        self.frames_written = 0
+        self._error = None
+        self._blocks = queue.Queue()
+        self.audio = None
+
+        self._output_file = None
+        self._sink = None
+        if self.keep_file:
+            self._output_file = self._new_temp_path()
+        else:
+            self._sink = _MemorySink(self.sample_rate)
+
         if self.on_status_update:
             self.on_status_update("Recording started...")
-        
+
         self.recording_thread = threading.Thread(
             target=self._record_thread,
             daemon=True
         )
         self.recording_thread.start()
-    
+
     def stop_recording(self):
-        """Stop recording and save the recorded audio to a file.
-        
+        """Stop recording and return the recorded audio.
+
+        Blocks are written while recording, so only the last few
+        milliseconds still need to be flushed here.
+
         Returns:
-            Path to the recorded audio file
+            Path to the recorded audio file, or with keep_file=False a
+            float32 numpy array of the samples (also kept in self.audio);
+            a path again if the recording outgrew max_memory_seconds
         """
         if not self.is_recording:
             return None
-        
+
         self.is_recording = False
-        
+
         if self.recording_thread and self.recording_thread.is_alive():
             self.recording_thread.join()
-        
-        if not self.recorded_data:
+
+        if self._sink is not None:
+            sink, self._sink = self._sink, None
+            if self._error or not self.frames_written:
+                if self.on_status_update and not self._error:
+                    self.on_status_update("No audio recorded")
+                return None
+            self.audio = sink.audio
             if self.on_status_update:
+                self.on_status_update("Recording finished")
+            return self.audio
+
+        filepath = self._output_file
+        self._output_file = None
+
+        if self._error or not self.frames_written:
+            if os.path.exists(filepath):
+                os.remove(filepath)
+            if self.on_status_update and not self._error:
                 self.on_status_update("No audio recorded")
             return None
-        
-        audio_data = np.concatenate(self.recorded_data, axis=0)
-        
-        fd, filepath = tempfile.mkstemp(suffix='.wav')
-        os.close(fd)
-        
-        sf.write(filepath, audio_data, self.sample_rate)
-        
+
         self.temp_file = filepath
-        
+
         if self.on_status_update:
             self.on_status_update("Recording saved")
-        
+
         return filepath
-    
-    def _record_thread(self):
-        """Background thread for recording audio."""
+
+    def _write_pending(self, sound_file, timeout):
+        """Write queued blocks to the file, waiting up to timeout for the first."""
+        try:
+            block = self._blocks.get(timeout=timeout) if timeout else self._blocks.get_nowait()
+            while True:
+                sound_file.write(block)
+                self.frames_written += len(block)
+                if self.on_audio_block:
+                    self.on_audio_block(block)
+                if sound_file is self._sink and self.frames_written > self.max_memory_seconds * self.sample_rate:
+                    sound_file = self._spill()
+                block = self._blocks.get_nowait()
+        except queue.Empty:
+            pass
+
+    def _new_temp_path(self):
+        fd, path = tempfile.mkstemp(suffix=FILE_FORMATS[self.file_format][2])
+        os.close(fd)
+        return path
+
+    def _spill(self):
+        """Move the in-memory recording to a temp file and continue there."""
+        self._output_file = self._new_temp_path()
+        sound_file = self._open_file(self._output_file)
+        sound_file.write(self._sink.audio)
+        self._target = sound_file
+        self._sink = None
+        return sound_file
+
+    def _capture(self):
+        """Run the input stream, writing blocks to the current target until stopped."""
+        # Imported here so the app window does not wait for PortAudio
+        import sounddevice as sd
+
         def callback(indata, frames, time, status):
             if status:
                 print(f"Recording status: {status}")
-            self.recorded_data.append(indata.copy())
-        
+            self._blocks.put(indata.copy())
+
         with sd.InputStream(
             samplerate=self.sample_rate,
             channels=self.channels,
+            dtype="float32",
             callback=callback
         ):
             while self.is_recording:
-                sd.sleep(100)
-    
+                self._write_pending(self._target, timeout=0.1)
+        # The stream is closed, write whatever arrived last
+        self._write_pending(self._target, timeout=None)
+
+    def _open_file(self, path):
+        import soundfile as sf
+
+        sf_format, subtype, _ = FILE_FORMATS[self.file_format]
+        return sf.SoundFile(
+            path,
+            mode="w",
+            samplerate=self.sample_rate,
+            channels=self.channels,
+            format=sf_format,
+            subtype=subtype,
+        )
+
+    def _record_thread(self):
+        """Background thread that captures audio into a file or memory."""
+        try:
+            self._target = self._sink if self._sink is not None else self._open_file(self._output_file)
+            try:
+                self._capture()
+            finally:
+                if self._target is not None and self._target is not self._sink:
+                    self._target.close()
+                self._target = None
+        except Exception as e:
+            self._error = e
+            self.is_recording = False
+            if self._output_file and os.path.exists(self._output_file):
+                os.remove(self._output_file)
+            if self.on_status_update:
+                self.on_status_update(f"Recording failed: {e}")
+
+    def save(self, path=None):
+        """Write an in-memory recording to a file.
+
+        Args:
+            path: Destination path (default: a new temp file in file_format)
+
+        Returns:
+            Path of the written file, or None if nothing was recorded
+        """
+        if self.audio is None:
+            return None
+        if path is None:
+            path = self._new_temp_path()
+            self.temp_file = path
+
+        with self._open_file(path) as sound_file:
+            sound_file.write(self.audio)
+        return path
+
     def cleanup(self):
         """Remove temporary files."""
         if self.temp_file and os.path.exists(self.temp_file):
@@ -95,4 +264,4 @@ class AudioRecorder:
                 os.remove(self.temp_file)
                 self.temp_file = None
             except Exception as e:
-                print(f"Error removing temp file: {e}") 
\ No newline at end of file
+                print(f"Error removing temp file: {e}")
@@ -0,0 +1,157 @@
+"""Audio inputs for live transcription: a microphone or a replayed recording.
+
+A source calls `callback(indata, frames, time, status)` with float32 blocks
+of shape (frames, 1), the same signature sounddevice uses, so the live
+pipeline runs unchanged whether audio comes from a device or a file.
+"""
+import threading
+import time
+
+import numpy as np
+
+
+class AudioSource:
+    """Base class for block-based audio inputs."""
+
+    name = "audio source"
+
+    def start(self, callback, blocksize, samplerate):
+        """Start delivering blocks to callback.
+
+        Args:
+            callback: Called as callback(indata, frames, time, status)
+            blocksize: Frames per block
+            samplerate: Sample rate the blocks must have
+        """
+        raise NotImplementedError
+
+    def stop(self):
+        """Stop delivering blocks and release the input."""
+        raise NotImplementedError
+
+
+class SoundDeviceSource(AudioSource):
+    """Microphone input through a sounddevice InputStream."""
+
+    def __init__(self, device=None):
+        """Initialize the source.
+
+        Args:
+            device: Input device index (None for the default device)
+        """
+        self.device = device
+        self.stream = None
+
+    @property
+    def name(self):
+        import sounddevice as sd
+        return sd.query_devices(device=self.device or sd.default.device[0])["name"]
+
+    def start(self, callback, blocksize, samplerate):
+        import sounddevice as sd
+
+        self.stream = sd.InputStream(
+            channels=1,
+            callback=callback,
+            blocksize=blocksize,
+            samplerate=samplerate,
+            device=self.device,
+        )
+        self.stream.start()
+
+    def stop(self):
+        if self.stream:
+            self.stream.stop()
+            self.stream.close()
+            self.stream = None
+
+
+class WavReplaySource(AudioSource):
+    """Replays a recording block by block at real time or N times faster.
+
+    Blocks are pushed from a background thread on a fixed schedule (no
+    drift from callback time), so repeated runs see the same audio at the
+    same pace, which makes latency and throughput measurements comparable.
+    """
+
+    def __init__(self, audio, speed=1.0, trailing_silence=1.5, on_finished=None):
+        """Initialize the source.
+
+        Args:
+            audio: Path to an audio file (decoded and resampled on start) or
+                float32 mono samples at the live sample rate
+            speed: Playback speed, 1.0 for real time, 0 for as fast as possible
+            trailing_silence: Seconds of near-silence appended so the last
+                utterance is closed
+            on_finished: Callback once the last block has been delivered
+        """
+        self.audio = audio
+        self.speed = speed
+        self.trailing_silence = trailing_silence
+        self.on_finished = on_finished
+        self.blocks_sent = 0
+        self.finished_at = None
+        self._stop = threading.Event()
+        self._finished = threading.Event()
+        self._thread = None
+
+    @property
+    def name(self):
+        label = self.audio if isinstance(self.audio, str) else "samples"
+        return f"replay of {label} at {self.speed:g}x" if self.speed else f"replay of {label} (unthrottled)"
+
+    def _load(self, samplerate):
+        if isinstance(self.audio, str):
+            from faster_whisper import decode_audio
+            return decode_audio(self.audio, sampling_rate=samplerate)
+        return np.asarray(self.audio, dtype=np.float32).reshape(-1)
+
+    def start(self, callback, blocksize, samplerate):
+        samples = self._load(samplerate)
+        # A faint noise floor like a real microphone's: the live callback
+        # skips blocks that are exactly zero
+        silence = np.random.default_rng(0).normal(0, 1e-4, int(self.trailing_silence * samplerate)).astype(np.float32)
+        samples = np.concatenate([samples, silence])
+        samples = np.pad(samples, (0, -len(samples) % blocksize)).reshape(-1, blocksize, 1)
+
+        self._stop.clear()
+        self._finished.clear()
+        self.blocks_sent = 0
+        self.finished_at = None
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(callback, samples, blocksize, samplerate),
+            daemon=True,
+        )
+        self._thread.start()
+
+    def _run(self, callback, blocks, blocksize, samplerate):
+        block_seconds = blocksize / samplerate / self.speed if self.speed else 0.0
+        started = time.perf_counter()
+        for index, block in enumerate(blocks):
+            if self._stop.is_set():
+                break
+            callback(block, blocksize, None, None)
+            self.blocks_sent += 1
+            if block_seconds:
+                delay = started + (index + 1) * block_seconds - time.perf_counter()
+                if delay > 0:
+                    self._stop.wait(delay)
+
+        self.finished_at = time.perf_counter()
+        self._finished.set()
+        if self.on_finished and not self._stop.is_set():
+            self.on_finished()
+
+    def wait(self, timeout=None):
+        """Block until the whole recording has been delivered.
+
+        Returns:
+            True if replay finished, False on timeout
+        """
+        return self._finished.wait(timeout)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
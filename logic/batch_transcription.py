@@ -0,0 +1,328 @@
+"""Headless batch transcription of audio folders to a JSONL file.
+
+Usage:
+    python -m logic.batch_transcription recordings/ -o transcripts.jsonl --model small
+    python -m logic.batch_transcription "notes/**/*.wav" -o out.jsonl --replicas 2
+"""
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Iterable, List, Optional
+
+from logic.model_pool import get_model_pool
+
+AUDIO_EXTENSIONS = ("wav", "mp3", "m4a", "ogg", "flac", "opus", "amr", "mp4")
+
+
+def collect_audio_files(source: str) -> List[str]:
+    """Resolve a directory or glob pattern to a sorted list of audio files.
+
+    Args:
+        source: Directory (searched recursively) or glob pattern
+
+    Returns:
+        Sorted list of absolute file paths
+    """
+    if os.path.isdir(source):
+        pattern = os.path.join(source, "**", "*")
+    else:
+        pattern = source
+
+    files = [
+        os.path.abspath(path)
+        for path in glob.glob(pattern, recursive=True)
+        if os.path.isfile(path) and path.rsplit(".", 1)[-1].lower() in AUDIO_EXTENSIONS
+    ]
+    return sorted(files)
+
+
+def load_completed(output_path: str) -> set:
+    """Return the files already transcribed successfully in an output file."""
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # A partially written last line from an interrupted run
+                continue
+            if "error" not in entry and "file" in entry:
+                completed.add(entry["file"])
+    return completed
+
+
+def transcribe_file(model, file_path, extractor=None, use_vad=True, language=None, task="transcribe", beam_size=5):
+    """Transcribe one file and build its JSONL record.
+
+    Args:
+        model: Loaded WhisperModel
+        file_path: Path to audio file
+        extractor: Optional EntityExtractor for entities and intent
+        use_vad: Whether to use VAD filter to remove silence
+        language: Language code (None or "auto" for detection)
+        task: Task to perform (transcribe or translate)
+        beam_size: Beam size for decoding
+
+    Returns:
+        Dict ready to be serialized as one JSON line
+    """
+    started = time.perf_counter()
+    segments, info = model.transcribe(
+        file_path,
+        vad_filter=use_vad,
+        language=None if language == "auto" else language,
+        task=task,
+        beam_size=beam_size,
+    )
+    segment_list = [
+        {"start": round(segment.start, 3), "end": round(segment.end, 3), "text": segment.text}
+        for segment in segments
+    ]
+    decoded = time.perf_counter()
+
+    text = " ".join(segment["text"] for segment in segment_list).strip()
+    record = {
+        "file": file_path,
+        "text": text,
+        "segments": segment_list,
+        "language": info.language,
+        "duration": round(info.duration, 3),
+    }
+
+    if extractor is not None:
+        processed_text = extractor.preprocess(text)
+        record["entities"] = extractor.extract_entities(processed_text)
+        record["intent"] = extractor.classify_intent(processed_text)
+    extracted = time.perf_counter()
+
+    record["timings"] = {
+        "decode_s": round(decoded - started, 3),
+        "extract_s": round(extracted - decoded, 3),
+        "total_s": round(extracted - started, 3),
+    }
+    return record
+
+
+# Per-process state for replica mode; set up once by _init_replica.
+_replica = {}
+
+
+def _init_replica(core_queue, model_name, device, compute_type, with_entities):
+    """Pin a replica process to its core subset and load its model."""
+    cores = core_queue.get()
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+
+    _replica["model"] = get_model_pool().get(
+        model_name,
+        device=device,
+        compute_type=compute_type,
+        cpu_threads=len(cores) if cores else 0,
+    )
+    if with_entities:
+        from logic.entity_extractor import EntityExtractor
+        _replica["extractor"] = EntityExtractor()
+
+
+def _replica_transcribe(file_path, options):
+    """Transcribe a file inside a replica process."""
+    try:
+        return transcribe_file(_replica["model"], file_path, _replica.get("extractor"), **options)
+    except Exception as e:
+        return {"file": file_path, "error": str(e)}
+
+
+def split_cores(replicas: int) -> List[List[int]]:
+    """Split the CPUs available to this process into contiguous subsets."""
+    if hasattr(os, "sched_getaffinity"):
+        cores = sorted(os.sched_getaffinity(0))
+    else:
+        cores = list(range(multiprocessing.cpu_count()))
+
+    replicas = max(1, min(replicas, len(cores)))
+    size = len(cores) // replicas
+    return [cores[i * size:(i + 1) * size] for i in range(replicas)]
+
+
+class BatchTranscriber:
+    """Transcribes many files over a bounded worker pool and streams JSONL."""
+
+    def __init__(
+        self,
+        model_name: str,
+        device: str = "cpu",
+        compute_type: str = "int8",
+        workers: int = 2,
+        replicas: int = 0,
+        use_vad: bool = True,
+        language: Optional[str] = None,
+        task: str = "transcribe",
+        beam_size: int = 5,
+        with_entities: bool = True,
+        on_progress=None,
+    ):
+        """Configure the batch run.
+
+        Args:
+            model_name: Whisper model name or local model path
+            device: Device to run model on (cpu/cuda)
+            compute_type: CTranslate2 compute type
+            workers: Concurrent transcriptions sharing one model (thread mode)
+            replicas: If > 0, run this many model replicas in separate
+                processes, each pinned to its own subset of cores
+            use_vad: Whether to use VAD filter to remove silence
+            language: Language code (None or "auto" for detection)
+            task: Task to perform (transcribe or translate)
+            beam_size: Beam size for decoding
+            with_entities: Whether to add entities and intent to each record
+            on_progress: Optional callback(done, total, record)
+        """
+        self.model_name = model_name
+        self.device = device
+        self.compute_type = compute_type
+        self.workers = max(1, workers)
+        self.replicas = max(0, replicas)
+        self.with_entities = with_entities
+        self.on_progress = on_progress
+        self.options = {
+            "use_vad": use_vad,
+            "language": language,
+            "task": task,
+            "beam_size": beam_size,
+        }
+
+    def run(self, files: Iterable[str], output_path: str) -> int:
+        """Transcribe all files not yet present in the output file.
+
+        Args:
+            files: Audio file paths
+            output_path: JSONL file that records are appended to
+
+        Returns:
+            Number of files transcribed in this run
+        """
+        completed = load_completed(output_path)
+        pending = [path for path in files if path not in completed]
+        if not pending:
+            return 0
+
+        with open(output_path, "a", encoding="utf-8") as out:
+            if self.replicas:
+                records = self._run_replicas(pending)
+            else:
+                records = self._run_threads(pending)
+
+            for done, record in enumerate(records, start=1):
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                if self.on_progress:
+                    self.on_progress(done, len(pending), record)
+        return len(pending)
+
+    def _run_threads(self, files):
+        """Yield records from a thread pool sharing one loaded model."""
+        model = get_model_pool().get(
+            self.model_name,
+            device=self.device,
+            compute_type=self.compute_type,
+            num_workers=self.workers,
+        )
+        extractor = None
+        extractor_lock = threading.Lock()
+        if self.with_entities:
+            from logic.entity_extractor import EntityExtractor
+            extractor = EntityExtractor()
+
+        def work(file_path):
+            try:
+                record = transcribe_file(model, file_path, None, **self.options)
+                if extractor is not None:
+                    started = time.perf_counter()
+                    # spaCy pipelines are not safe to call from several threads
+                    with extractor_lock:
+                        processed_text = extractor.preprocess(record["text"])
+                        record["entities"] = extractor.extract_entities(processed_text)
+                        record["intent"] = extractor.classify_intent(processed_text)
+                    # Includes waiting for the lock, as it delays the record too
+                    extract_s = time.perf_counter() - started
+                    timings = record["timings"]
+                    timings["extract_s"] = round(extract_s, 3)
+                    timings["total_s"] = round(timings["decode_s"] + extract_s, 3)
+                return record
+            except Exception as e:
+                return {"file": file_path, "error": str(e)}
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(work, path) for path in files]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def _run_replicas(self, files):
+        """Yield records from model replicas in core-pinned processes."""
+        subsets = split_cores(self.replicas)
+        context = multiprocessing.get_context("spawn")
+        core_queue = context.Queue()
+        for cores in subsets:
+            core_queue.put(cores)
+
+        with ProcessPoolExecutor(
+            max_workers=len(subsets),
+            mp_context=context,
+            initializer=_init_replica,
+            initargs=(core_queue, self.model_name, self.device, self.compute_type, self.with_entities),
+        ) as executor:
+            futures = [executor.submit(_replica_transcribe, path, self.options) for path in files]
+            for future in as_completed(futures):
+                yield future.result()
+
+
+def main(argv=None):
+    """Command line entry point for batch transcription."""
+    parser = argparse.ArgumentParser(description="Transcribe a folder of maintenance voice notes to JSONL.")
+    parser.add_argument("source", help="Directory or glob pattern of audio files")
+    parser.add_argument("-o", "--output", default="transcripts.jsonl", help="JSONL output file (appended, resumable)")
+    parser.add_argument("--model", default="tiny", help="Whisper model name or local model path")
+    parser.add_argument("--device", default="cpu", choices=["cpu", "cuda"])
+    parser.add_argument("--compute-type", default="int8")
+    parser.add_argument("--workers", type=int, default=2, help="Concurrent files sharing one model")
+    parser.add_argument("--replicas", type=int, default=0, help="Model replicas in core-pinned processes")
+    parser.add_argument("--language", default=None)
+    parser.add_argument("--task", default="transcribe", choices=["transcribe", "translate"])
+    parser.add_argument("--beam-size", type=int, default=5)
+    parser.add_argument("--no-vad", action="store_true", help="Disable the VAD filter")
+    parser.add_argument("--no-entities", action="store_true", help="Skip entity and intent extraction")
+    args = parser.parse_args(argv)
+
+    files = collect_audio_files(args.source)
+
+    def on_progress(done, total, record):
+        status = "error: " + record["error"] if "error" in record else f"{record['timings']['total_s']}s"
+        print(f"[{done}/{total}] {os.path.basename(record['file'])} ({status})")
+
+    transcriber = BatchTranscriber(
+        model_name=args.model,
+        device=args.device,
+        compute_type=args.compute_type,
+        workers=args.workers,
+        replicas=args.replicas,
+        use_vad=not args.no_vad,
+        language=args.language,
+        task=args.task,
+        beam_size=args.beam_size,
+        with_entities=not args.no_entities,
+        on_progress=on_progress,
+    )
+    count = transcriber.run(files, args.output)
+    print(f"Transcribed {count} of {len(files)} files into {args.output}")
+
+
+if __name__ == "__main__":
+    main()
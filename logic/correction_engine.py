@@ -0,0 +1,292 @@
+"""Dictionary-based correction of transcript segments.
+
+Known misrecognitions from corrections.json and a user-maintained term
+list (machine names, line IDs like "L-78", part numbers) are compiled once;
+correcting a segment is then a single left-to-right pass over its tokens,
+a cheap alternative to running a seq2seq model on every utterance.
+
+Usage:
+    python -m logic.correction_engine "die calibrierung an linie l, -78"
+"""
+import argparse
+import difflib
+import json
+import re
+import time
+from typing import Dict, Iterable, NamedTuple
+
+from logic.aho_corasick import AhoCorasick
+from logic.fuzzy_trie import FuzzyTrie
+
+CORRECTIONS_FILE = "corrections.json"
+TERMS_FILE = "correction_terms.txt"
+
+# Letters and digits; everything else (spaces, punctuation, hyphens)
+# separates tokens and is ignored when matching
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+DIGITS = re.compile(r"\d+")
+
+# Token runs remembered with their term match; speech repeats words a lot
+TERM_CACHE_SIZE = 4096
+
+
+class Correction(NamedTuple):
+    """A replacement made in the corrected text."""
+    kind: str  # "phrase" or "term"
+    start: int  # character offsets in the input text
+    end: int
+    original: str
+    replacement: str
+    distance: int
+
+
+def tokenize(text):
+    """Return (key, start, end) per token; keys are case-folded."""
+    return [(match.group().casefold(), match.start(), match.end()) for match in TOKEN_PATTERN.finditer(text)]
+
+
+def _key(text):
+    return tuple(key for key, _, _ in tokenize(text))
+
+
+def derive_rules(raw, corrected, min_token_length=4):
+    """Split a raw -> corrected transcript pair into word-level rules.
+
+    The token sequences are aligned and every replaced run becomes a rule
+    of its own, so a misrecognized word is fixed wherever it recurs, not
+    only in the exact sentence it was reported in. Runs involving digits
+    (dates, IDs: the correction is about facts, not recognition) and short
+    words (too ambiguous out of context) are skipped.
+
+    A single pair cannot tell a misrecognition from an edit that was only
+    right in its sentence (a plural made singular, a word translated), so
+    derived rules should be reviewed before they are enabled.
+
+    Returns:
+        Dict of raw phrase to corrected phrase
+    """
+    raw_tokens = tokenize(raw)
+    corrected_tokens = tokenize(corrected)
+    matcher = difflib.SequenceMatcher(
+        None, [key for key, _, _ in raw_tokens], [key for key, _, _ in corrected_tokens], autojunk=False
+    )
+    rules = {}
+    for op, i1, i2, j1, j2 in matcher.get_opcodes():
+        if op != "replace":
+            continue
+        if i2 - i1 == j2 - j1:
+            pairs = [((i, i + 1), (j, j + 1)) for i, j in zip(range(i1, i2), range(j1, j2))]
+        else:
+            pairs = [((i1, i2), (j1, j2))]
+        for (a1, a2), (b1, b2) in pairs:
+            source = raw[raw_tokens[a1][1]:raw_tokens[a2 - 1][2]]
+            target = corrected[corrected_tokens[b1][1]:corrected_tokens[b2 - 1][2]]
+            if DIGITS.search(source) or DIGITS.search(target):
+                continue
+            if min(len(key) for key, _, _ in raw_tokens[a1:a2]) < min_token_length:
+                continue
+            rules[source] = target
+    return rules
+
+
+def load_terms(path=TERMS_FILE):
+    """Read a term list: one term per line, '#' starts a comment."""
+    terms = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                term = line.split("#", 1)[0].strip()
+                if term:
+                    terms.append(term)
+    except FileNotFoundError:
+        pass
+    return terms
+
+
+class CorrectionEngine:
+    """Applies phrase corrections exactly and term corrections fuzzily.
+
+    Phrases (raw -> corrected pairs, optionally with the word-level rules
+    derived from them) are matched on case-folded token sequences by an Aho-Corasick
+    automaton over tokens, so punctuation and spacing do not matter.
+    Terms are matched against runs of up to `max_term_tokens` tokens
+    joined without separators ("l, -78" and "L78" both read "l78") in a
+    FuzzyTrie, allowing a few edits for longer terms. Digits never count
+    as fixable: a candidate must contain exactly the term's digits, so
+    "L-70" is not turned into "L-78".
+    """
+
+    def __init__(
+        self,
+        phrases: Dict[str, str] = None,
+        terms: Iterable[str] = (),
+        max_distance=2,
+        min_fuzzy_length=5,
+        max_term_tokens=3,
+        derive=False,
+    ):
+        """Compile the matchers.
+
+        Args:
+            phrases: Raw -> corrected text pairs
+            terms: Canonical spellings of domain terms
+            max_distance: Most edits allowed for a fuzzy term match
+            min_fuzzy_length: Terms shorter than this (letters and digits
+                only) must match exactly
+            max_term_tokens: Longest token run compared with the terms
+            derive: Also apply word-level rules learned from each phrase
+                pair everywhere (see derive_rules; off by default)
+        """
+        self.max_distance = max_distance
+        self.min_fuzzy_length = min_fuzzy_length
+        self.max_term_tokens = max_term_tokens
+
+        rules = {}
+        for raw, corrected in (phrases or {}).items():
+            if derive:
+                rules.update(derive_rules(raw, corrected))
+        # Whole pairs last so they win over rules derived from them
+        rules.update(phrases or {})
+        self.phrases = {}
+        for raw, corrected in rules.items():
+            key = _key(raw)
+            if key:
+                self.phrases[key] = corrected
+        self.phrase_matcher = AhoCorasick((key, key) for key in self.phrases)
+
+        self._term_cache = {}
+        self.terms = FuzzyTrie()
+        for term in terms:
+            key = "".join(_key(term))
+            if key:
+                self.terms.add(key, term)
+
+    @classmethod
+    def from_files(cls, corrections_path=CORRECTIONS_FILE, terms_path=TERMS_FILE, **kwargs):
+        """Create an engine from corrections.json and a term list; missing files are skipped."""
+        phrases = {}
+        if corrections_path:
+            try:
+                with open(corrections_path, "r", encoding="utf-8") as f:
+                    phrases = json.load(f)
+            except FileNotFoundError:
+                print(f"Corrections file {corrections_path} not found")
+        return cls(phrases, load_terms(terms_path) if terms_path else (), **kwargs)
+
+    def allowed_distance(self, length):
+        """Edits tolerated for a key of this many characters."""
+        if length < self.min_fuzzy_length:
+            return 0
+        return min(self.max_distance, 1 if length < 9 else 2)
+
+    def _match_term(self, key):
+        """Return (distance, term) for the closest term to key, or None."""
+        try:
+            return self._term_cache[key]
+        except KeyError:
+            pass
+        if len(self._term_cache) >= TERM_CACHE_SIZE:
+            self._term_cache.clear()
+        match = self._term_cache[key] = self._find_term(key)
+        return match
+
+    def _find_term(self, key):
+        term = self.terms.get(key)
+        if term is not None:
+            return 0, term
+        limit = self.allowed_distance(len(key))
+        if not limit:
+            return None
+        digits = DIGITS.findall(key)
+        for distance, term_key, term in self.terms.search(key, limit):
+            if distance <= self.allowed_distance(len(term_key)) and DIGITS.findall(term_key) == digits:
+                return distance, term
+        return None
+
+    def correct(self, text):
+        """Correct a segment.
+
+        Returns:
+            Tuple of (corrected text, list of Correction)
+        """
+        tokens = tokenize(text)
+        if not tokens:
+            return text, []
+
+        # Longest phrase starting at each token
+        phrase_at = {}
+        for start, end, key in self.phrase_matcher.iter_matches([key for key, _, _ in tokens]):
+            if end > phrase_at.get(start, (0, None))[0]:
+                phrase_at[start] = (end, key)
+
+        corrections = []
+        i = 0
+        while i < len(tokens):
+            found = None
+            if i in phrase_at:
+                end, key = phrase_at[i]
+                found = ("phrase", end, self.phrases[key], 0)
+            elif len(self.terms):
+                joined = ""
+                candidates = []
+                for end in range(i + 1, min(i + self.max_term_tokens, len(tokens)) + 1):
+                    joined += tokens[end - 1][0]
+                    if len(joined) > self.terms.max_length + self.max_distance:
+                        break
+                    match = self._match_term(joined)
+                    # A fuzzy run must not absorb a whole neighbouring word ("a hydraulic")
+                    if match is not None and (
+                        end == i + 1 or min(len(tokens[i][0]), len(tokens[end - 1][0])) > match[0]
+                    ):
+                        candidates.append((match[0], -end, match[1]))
+                if candidates:
+                    # Closest first, then the longest run
+                    distance, end, term = min(candidates)
+                    found = ("term", -end, term, distance)
+
+            if found is None:
+                i += 1
+                continue
+            kind, end, replacement, distance = found
+            start_char, end_char = tokens[i][1], tokens[end - 1][2]
+            original = text[start_char:end_char]
+            if original != replacement:
+                corrections.append(Correction(kind, start_char, end_char, original, replacement, distance))
+            i = end
+
+        if not corrections:
+            return text, []
+        parts = []
+        position = 0
+        for correction in corrections:
+            parts.append(text[position:correction.start])
+            parts.append(correction.replacement)
+            position = correction.end
+        parts.append(text[position:])
+        return "".join(parts), corrections
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Correct transcript text with corrections.json and a term list.")
+    parser.add_argument("text", nargs="+", help="Text to correct")
+    parser.add_argument("--corrections", default=CORRECTIONS_FILE)
+    parser.add_argument("--terms", default=TERMS_FILE)
+    parser.add_argument("--max-distance", type=int, default=2)
+    parser.add_argument("--derive", action="store_true", help="Also apply word-level rules derived from the pairs")
+    args = parser.parse_args(argv)
+
+    engine = CorrectionEngine.from_files(
+        args.corrections, args.terms, max_distance=args.max_distance, derive=args.derive
+    )
+    text = " ".join(args.text)
+    started = time.perf_counter()
+    corrected, corrections = engine.correct(text)
+    elapsed = time.perf_counter() - started
+    print(corrected)
+    for correction in corrections:
+        print(f"  {correction.kind}: {correction.original!r} -> {correction.replacement!r} (distance {correction.distance})")
+    print(f"{len(engine.phrases)} phrases, {len(engine.terms)} terms, corrected in {elapsed * 1e6:.0f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,15 @@
-import spacy
-import re
-import json
 import time
 import logging
+from logic.extraction_engine import ExtractionEngine
+from logic.jsonl_log import get_log_writer, iter_log_entries
+from logic.nlp import get_pipeline
+from logic.tracing import get_tracer
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s", handlers=[logging.StreamHandler()])
 logger = logging.getLogger(__name__)
 
 class EntityExtractor:
     def __init__(self):
-        try:
-            self.nlp = spacy.load("en_core_web_sm")
-        except Exception as e:
-            logger.error(f"Error loading spaCy model: {e}. Run 'python -m spacy download en_core_web_sm'")
-            raise
         self.patterns = {
             "machine_id": r"\bM\d{1,6}\b",  # Matches M followed by 1-6 digits
             "order_number": r"\b\d{3,6}\b",  # Matches 3-6 digit numbers
@@ -26,34 +22,69 @@ class EntityExtractor:
             "identify": ["machine id", "order id", "employee id"],
             "request": ["read", "details", "show"]
         }
-        self.output_file = "entities_intents.json"
-        self.log = []
+        self.engine = self._compile()
+        self.output_file = "entities_intents.jsonl"
+        self.legacy_output_file = "entities_intents.json"
+
+    def _compile(self):
+        # Bare numbers are only used for the "order" context rule in
+        # extract_entities; listed last so the real ID formats win.
+        return ExtractionEngine(dict(self.patterns, number=r"\b\d+\b"), self.intent_keywords)
+
+    @property
+    def nlp(self):
+        # Shared tokenizer-only pipeline, loaded on first use: preprocess
+        # only needs tokens and the lexical is_punct flag.
+        return get_pipeline()
 
     def preprocess(self, text):
-        text = text.lower().strip()
-        doc = self.nlp(text)
-        return " ".join(token.text for token in doc if not token.is_punct)
+        with get_tracer().span("entities.preprocess"):
+            text = text.lower().strip()
+            doc = self.nlp.make_doc(text)
+            return " ".join(token.text for token in doc if not token.is_punct)
 
-    def extract_entities(self, text):
-        entities = {"machine_id": None, "order_number": None, "employee_id": None}
-        text_lower = text.lower()
-        for entity_type, pattern in self.patterns.items():
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            if matches:
-                entities[entity_type] = matches[0]
-            # Additional check for context
-            if entity_type == "order_number" and "order" in text_lower:
-                num_matches = re.findall(r"\b\d+\b", text)
-                if num_matches:
-                    entities["order_number"] = num_matches[0]
+    def preprocess_many(self, texts, batch_size=64):
+        """Preprocess many texts with spaCy's batched nlp.pipe."""
+        docs = self.nlp.pipe((text.lower().strip() for text in texts), batch_size=batch_size)
+        return [" ".join(token.text for token in doc if not token.is_punct) for doc in docs]
+
+    def extract_many(self, texts, batch_size=64):
+        """Run preprocess and extract over many texts, e.g. for bulk jobs."""
+        return [self.extract(text) for text in self.preprocess_many(texts, batch_size)]
+
+    def _entities_from_spans(self, spans, text):
+        entities = {entity_type: None for entity_type in self.patterns}
+        first_number = None
+        for span in spans:
+            if span.label == "number":
+                if first_number is None:
+                    first_number = span.text
+            elif entities[span.label] is None:
+                entities[span.label] = span.text
+                if span.label == "order_number" and first_number is None:
+                    first_number = span.text
+        # Additional check for context
+        if "order" in text.lower() and first_number is not None:
+            entities["order_number"] = first_number
         return entities
 
+    def extract_entities(self, text):
+        with get_tracer().span("entities.extract"):
+            return self._entities_from_spans(self.engine.entity_spans(text), text)
+
     def classify_intent(self, text):
-        text_lower = text.lower()
-        for intent, keywords in self.intent_keywords.items():
-            if any(keyword in text_lower for keyword in keywords):
-                return intent
-        return "unknown"
+        with get_tracer().span("entities.intent"):
+            return self.engine.best_intent(self.engine.intent_spans(text))
+
+    def extract(self, text):
+        """Find entities, intent and their spans in a single pass over text."""
+        with get_tracer().span("entities.scan"):
+            spans = self.engine.scan(text)
+            return {
+                "entities": self._entities_from_spans([span for span in spans if span.kind == "entity"], text),
+                "intent": self.engine.best_intent(spans),
+                "spans": [span._asdict() for span in spans],
+            }
 
     def log_entities_intents(self, entities, intent, transcription):
         log_entry = {
@@ -62,10 +93,12 @@ class EntityExtractor:
             "entities": entities,
             "intent": intent
         }
-        self.log.append(log_entry)
         try:
-            with open(self.output_file, "w") as f:
-                json.dump(self.log, f, indent=4)
+            get_log_writer(self.output_file).write(log_entry)
             logger.info(f"Logged: Entities={entities}, Intent={intent}")
         except Exception as e:
-            logger.error(f"Failed to log: {e}")
\ No newline at end of file
+            logger.error(f"Failed to log: {e}")
+
+    def iter_log(self):
+        """Stream all logged entries oldest first, including the legacy JSON log."""
+        return iter_log_entries(self.output_file, legacy_path=self.legacy_output_file)
\ No newline at end of file
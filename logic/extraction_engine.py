@@ -0,0 +1,84 @@
+"""Single-pass entity and intent matching for transcripts."""
+import re
+from typing import Dict, List, NamedTuple
+
+from logic.aho_corasick import AhoCorasick
+
+
+class Span(NamedTuple):
+    """A match in the scanned text."""
+    kind: str  # "entity" or "intent"
+    label: str  # entity type or intent name
+    start: int
+    end: int
+    text: str
+
+
+class ExtractionEngine:
+    """Finds all entity and intent hits in one scan per kind.
+
+    Entity patterns are compiled once into a single alternation with one
+    named group per entity type, so a transcript is scanned by one regex
+    regardless of how many ID formats are registered. Where patterns
+    could match at the same position, the one listed first wins. Intent
+    keywords go into an Aho-Corasick automaton over the lower-cased text,
+    which keeps substring semantics at a cost independent of the number
+    of keywords.
+    """
+
+    def __init__(self, patterns: Dict[str, str], intent_keywords: Dict[str, List[str]], flags=re.IGNORECASE):
+        """Compile the engine.
+
+        Args:
+            patterns: Ordered mapping of entity type to regex
+            intent_keywords: Ordered mapping of intent to keywords; earlier
+                intents take precedence when several match
+            flags: Regex flags applied to the combined entity pattern
+        """
+        self.labels = list(patterns)
+        self._groups = {f"g{i}": label for i, label in enumerate(self.labels)}
+        combined = "|".join(f"(?P<g{i}>{pattern})" for i, pattern in enumerate(patterns.values()))
+        self.entity_regex = re.compile(combined, flags) if combined else None
+
+        self.intents = list(intent_keywords)
+        self._priority = {intent: rank for rank, intent in enumerate(self.intents)}
+        self.longest_keyword = max((len(k) for keywords in intent_keywords.values() for k in keywords), default=0)
+        self.keyword_matcher = AhoCorasick(
+            (keyword.lower(), intent)
+            for intent, keywords in intent_keywords.items()
+            for keyword in keywords
+        )
+
+    def entity_spans(self, text, pos=0) -> List[Span]:
+        """Return entity matches in order of position.
+
+        Args:
+            text: Text to scan
+            pos: Index to start matching at; unlike slicing, word boundaries
+                still see the characters before it
+        """
+        if self.entity_regex is None:
+            return []
+        return [
+            Span("entity", self._groups[match.lastgroup], match.start(), match.end(), match.group())
+            for match in self.entity_regex.finditer(text, pos)
+        ]
+
+    def intent_spans(self, text, pos=0) -> List[Span]:
+        """Return intent keyword matches starting at or after pos, ordered by end position."""
+        return [
+            Span("intent", intent, pos + start, pos + end, text[pos + start:pos + end])
+            for start, end, intent in self.keyword_matcher.iter_matches(text[pos:].lower())
+        ]
+
+    def scan(self, text) -> List[Span]:
+        """Return all entity and intent spans ordered by start position."""
+        return sorted(self.entity_spans(text) + self.intent_spans(text), key=lambda span: (span.start, span.end))
+
+    def best_intent(self, spans) -> str:
+        """Pick the highest-priority intent among spans ("unknown" if none)."""
+        return self.best_of(span.label for span in spans if span.kind == "intent")
+
+    def best_of(self, intents) -> str:
+        """Pick the highest-priority intent name ("unknown" if none)."""
+        return min(intents, key=self._priority.__getitem__, default="unknown")
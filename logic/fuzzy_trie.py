@@ -0,0 +1,144 @@
+"""Character trie with edit-distance bounded lookup."""
+from collections import defaultdict
+from typing import Any, List, Tuple
+
+
+class FuzzyTrie:
+    """Maps strings to values and finds keys within a Levenshtein distance.
+
+    A search walks the trie once, keeping one row of the edit-distance
+    table per node and abandoning a branch as soon as every entry of its
+    row exceeds the bound or no key below it has a usable length, so only
+    the few prefixes close to the query are visited regardless of how
+    many keys are stored. Rows are only computed within the diagonal band
+    the bound allows.
+
+    Before walking the trie, a query is checked against a bigram index:
+    each edit destroys at most two bigrams, so a key within distance k of
+    a word of length n shares at least max(n, len(key)) - 1 - 2k of its
+    bigrams. Most queries in running text share too few with every key
+    and are rejected with a handful of dictionary lookups.
+    """
+
+    def __init__(self, items=()):
+        """Build a trie.
+
+        Args:
+            items: Iterable of (key, value) pairs
+        """
+        self._children = [{}]
+        self._values = [None]
+        # Shortest and longest key below each node
+        self._lengths = [None]
+        # Bigram -> ids of the keys containing it, for the count filter
+        self._postings = defaultdict(list)
+        self._key_lengths = []
+        self._size = 0
+        self.min_length = None
+        self.max_length = 0
+        for key, value in items:
+            self.add(key, value)
+
+    def __len__(self):
+        return self._size
+
+    def add(self, key, value=None):
+        """Store value under key, replacing an earlier value for the same key."""
+        node = 0
+        self._extend_lengths(node, len(key))
+        for char in key:
+            nxt = self._children[node].get(char)
+            if nxt is None:
+                nxt = len(self._children)
+                self._children[node][char] = nxt
+                self._children.append({})
+                self._values.append(None)
+                self._lengths.append(None)
+            node = nxt
+            self._extend_lengths(node, len(key))
+        if self._values[node] is None:
+            self._size += 1
+            key_id = len(self._key_lengths)
+            self._key_lengths.append(len(key))
+            for bigram in {key[i:i + 2] for i in range(len(key) - 1)}:
+                self._postings[bigram].append(key_id)
+        self._values[node] = (key, value)
+        self.min_length = len(key) if self.min_length is None else min(self.min_length, len(key))
+        self.max_length = max(self.max_length, len(key))
+
+    def _extend_lengths(self, node, length):
+        lengths = self._lengths[node]
+        self._lengths[node] = (length, length) if lengths is None else (min(lengths[0], length), max(lengths[1], length))
+
+    def get(self, key, default=None):
+        """Return the value stored under key exactly."""
+        node = 0
+        for char in key:
+            node = self._children[node].get(char)
+            if node is None:
+                return default
+        entry = self._values[node]
+        return default if entry is None else entry[1]
+
+    def _may_match(self, word, max_distance):
+        """False if no key can be within max_distance of word by the bigram count."""
+        size = len(word)
+        if size - 1 - 2 * max_distance <= 0:
+            # Short words may share no bigram with a match
+            return True
+        # Counting every occurrence in word may overestimate what is shared,
+        # which only makes the filter let more through
+        shared = defaultdict(int)
+        postings = self._postings
+        for i in range(size - 1):
+            for key_id in postings.get(word[i:i + 2], ()):
+                shared[key_id] += 1
+        for key_id, common in shared.items():
+            length = self._key_lengths[key_id]
+            if abs(length - size) <= max_distance and common >= max(size, length) - 1 - 2 * max_distance:
+                return True
+        return False
+
+    def search(self, word, max_distance) -> List[Tuple[int, str, Any]]:
+        """Return (distance, key, value) for every key within max_distance of word, closest first."""
+        if self.min_length is None or not (
+            self.min_length - max_distance <= len(word) <= self.max_length + max_distance
+        ):
+            return []
+        if not self._may_match(word, max_distance):
+            return []
+        results = []
+        size = len(word)
+        low_length, high_length = size - max_distance, size + max_distance
+        over = max_distance + 1
+        first_row = [column if column <= max_distance else over for column in range(size + 1)]
+        # Iterative depth-first walk: (node, depth, char leading to it, parent row)
+        stack = [(child, 1, char, first_row) for char, child in self._children[0].items()]
+        while stack:
+            node, depth, char, previous = stack.pop()
+            shortest, longest = self._lengths[node]
+            if longest < low_length or shortest > high_length:
+                continue
+            # Cells further than max_distance from the diagonal cannot be within the bound
+            row = [over] * (size + 1)
+            if depth <= max_distance:
+                row[0] = depth
+            best = row[0]
+            for column in range(max(1, depth - max_distance), min(size, depth + max_distance) + 1):
+                cost = previous[column - 1] + (word[column - 1] != char)
+                if previous[column] + 1 < cost:
+                    cost = previous[column] + 1
+                if row[column - 1] + 1 < cost:
+                    cost = row[column - 1] + 1
+                if cost > over:
+                    cost = over
+                row[column] = cost
+                if cost < best:
+                    best = cost
+            entry = self._values[node]
+            if entry is not None and row[size] <= max_distance:
+                results.append((row[size], entry[0], entry[1]))
+            if best <= max_distance:
+                stack.extend((child, depth + 1, next_char, row) for next_char, child in self._children[node].items())
+        results.sort(key=lambda result: (result[0], result[1]))
+        return results
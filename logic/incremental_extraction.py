@@ -0,0 +1,145 @@
+"""Incremental entity and intent extraction for live transcripts."""
+from collections import Counter
+
+from logic.tracing import get_tracer
+
+# Labels whose first match is the "order" context rule's number
+NUMERIC_LABELS = ("number", "order_number")
+
+
+class IncrementalExtractor:
+    """Keeps entities and intent of a growing transcript up to date per segment.
+
+    Each new segment is preprocessed on its own and appended to the
+    processed text. Only the tail of the text is rescanned: entity regexes
+    from `window` characters before the old end (or from the start of a
+    match reaching into that window, so a number split across segments
+    is re-read whole), intent keywords from one keyword length before it.
+    Matches before that point cannot change, so each update costs time
+    proportional to the new segment rather than to the session so far.
+    Results are the same as running `EntityExtractor.extract` over the
+    whole processed text.
+    """
+
+    def __init__(self, extractor, window=64):
+        """Initialize the extractor.
+
+        Args:
+            extractor: EntityExtractor providing preprocessing, the compiled
+                engine and logging
+            window: Characters before the previous end rescanned for entities;
+                must cover the longest entity match
+        """
+        self.extractor = extractor
+        self.engine = extractor.engine
+        self.window = window
+        self.reset()
+
+    def reset(self):
+        """Forget the transcript, e.g. when a new live session starts."""
+        self._text = ""
+        self._entity_spans = []
+        self._intent_spans = []
+        self._first = {}
+        self._intent_counts = Counter()
+        self._mentions_order = False
+
+    @property
+    def text(self):
+        """Processed transcript so far."""
+        return self._text
+
+    @property
+    def spans(self):
+        """All entity and intent spans, ordered by start position."""
+        return sorted(self._entity_spans + self._intent_spans, key=lambda span: (span.start, span.end))
+
+    @property
+    def entities(self):
+        entities = {label: None for label in self.extractor.patterns}
+        for label in entities:
+            if label in self._first:
+                entities[label] = self._first[label].text
+        first_number = self._first.get(NUMERIC_LABELS)
+        if self._mentions_order and first_number is not None:
+            entities["order_number"] = first_number.text
+        return entities
+
+    @property
+    def intent(self):
+        return self.engine.best_of(intent for intent, count in self._intent_counts.items() if count)
+
+    def feed(self, segment, log=True):
+        """Add a transcript segment and update entities and intent.
+
+        Args:
+            segment: New raw transcript text
+            log: Append the segment with the current entities and intent to
+                the extractor's log
+
+        Returns:
+            Dict with "entities", "intent", the "new_spans" found in this
+            update and the processed "text"
+        """
+        processed = self.extractor.preprocess(segment)
+        if not processed:
+            return self._result([])
+
+        with get_tracer().span("entities.incremental", chars=len(processed)):
+            old_len = len(self._text)
+            self._text = f"{self._text} {processed}" if self._text else processed
+            new_spans = self._rescan_entities(old_len) + self._rescan_intents(old_len)
+            if not self._mentions_order:
+                self._mentions_order = "order" in self._text[max(0, old_len - len("order")):].lower()
+
+        result = self._result(new_spans)
+        if log:
+            self.extractor.log_entities_intents(result["entities"], result["intent"], segment)
+        return result
+
+    def _result(self, new_spans):
+        return {
+            "entities": self.entities,
+            "intent": self.intent,
+            "new_spans": [span._asdict() for span in sorted(new_spans, key=lambda span: (span.start, span.end))],
+            "text": self._text,
+        }
+
+    def _rescan_entities(self, old_len):
+        start = max(0, old_len - self.window)
+        # Widen to any match reaching into the window; it may now extend further
+        for span in reversed(self._entity_spans):
+            if span.end <= start:
+                break
+            start = min(start, span.start)
+
+        keep = len(self._entity_spans)
+        while keep and self._entity_spans[keep - 1].start >= start:
+            keep -= 1
+        for span in self._entity_spans[keep:]:
+            self._forget(span)
+        del self._entity_spans[keep:]
+
+        spans = self.engine.entity_spans(self._text, start)
+        for span in spans:
+            self._entity_spans.append(span)
+            self._first.setdefault(span.label, span)
+            if span.label in NUMERIC_LABELS:
+                self._first.setdefault(NUMERIC_LABELS, span)
+        return spans
+
+    def _forget(self, span):
+        # Only spans after the rescan point are dropped, so a dropped first
+        # match is either found again or no longer exists
+        for key in (span.label, NUMERIC_LABELS):
+            if self._first.get(key) is span:
+                del self._first[key]
+
+    def _rescan_intents(self, old_len):
+        # A keyword ending in the new text starts at most one keyword length
+        # earlier; matches ending before old_len were found last time
+        start = max(0, old_len - self.engine.longest_keyword + 1)
+        spans = [span for span in self.engine.intent_spans(self._text, start) if span.end > old_len]
+        self._intent_spans.extend(spans)
+        self._intent_counts.update(span.label for span in spans)
+        return spans
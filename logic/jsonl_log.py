@@ -0,0 +1,223 @@
+"""Append-only JSONL logging with a background writer and size-based rotation."""
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Dict, Iterator, Optional
+
+_STOP = object()
+
+logger = logging.getLogger(__name__)
+
+
+class JsonlLogWriter:
+    """Appends JSON entries to a file from a background thread.
+
+    `write` only enqueues, so logging costs O(1) for the caller no matter how
+    long the log is. The writer thread batches lines, flushes after each
+    batch, calls fsync at most every `fsync_interval` seconds, and rotates
+    the file to path.1, path.2, ... once it grows beyond `max_bytes`.
+    If the file cannot be opened or written, the writer stops and records
+    the error in `failed`; later writes raise instead of queueing forever.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5, fsync_interval: float = 1.0):
+        """Start the writer thread.
+
+        Args:
+            path: JSONL file to append to
+            max_bytes: Size after which the file is rotated (0 disables rotation)
+            backup_count: Number of rotated files to keep
+            fsync_interval: Minimum seconds between fsync calls
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.fsync_interval = fsync_interval
+        self._queue = queue.Queue()
+        self._closed = False
+        self.failed = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def alive(self):
+        return not self._closed and self.failed is None
+
+    def write(self, entry: Dict):
+        """Queue an entry to be appended.
+
+        Raises:
+            ValueError: If the writer was closed
+            OSError: If the writer stopped after a file error
+        """
+        if self._closed:
+            raise ValueError(f"Log writer for {self.path} is closed")
+        if self.failed is not None:
+            raise OSError(f"Log writer for {self.path} stopped: {self.failed}")
+        self._queue.put(entry)
+
+    def flush(self, timeout: Optional[float] = 10.0) -> bool:
+        """Wait until all queued entries have been written and synced.
+
+        Returns:
+            False if the writer is not running or did not finish in time
+        """
+        if not self.alive:
+            return False
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout) and self.failed is None
+
+    def close(self):
+        """Write remaining entries and stop the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        return open(self.path, "a", encoding="utf-8")
+
+    def _rotate(self, f):
+        """Close the current file, shift backups and start a new file."""
+        f.close()
+        if self.backup_count > 0:
+            for i in range(self.backup_count - 1, 0, -1):
+                src = f"{self.path}.{i}"
+                if os.path.exists(src):
+                    os.replace(src, f"{self.path}.{i + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        return self._open()
+
+    def _run(self):
+        f = None
+        try:
+            f = self._open()
+            last_sync = time.monotonic()
+            while True:
+                batch = [self._queue.get()]
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                stop = False
+                waiters = []
+                for item in batch:
+                    if item is _STOP:
+                        stop = True
+                    elif isinstance(item, threading.Event):
+                        waiters.append(item)
+                    else:
+                        try:
+                            f.write(json.dumps(item, ensure_ascii=False) + "\n")
+                        except (TypeError, ValueError) as e:
+                            logger.warning("Skipping log entry that is not JSON serializable: %s", e)
+                f.flush()
+
+                now = time.monotonic()
+                if stop or waiters or now - last_sync >= self.fsync_interval:
+                    os.fsync(f.fileno())
+                    last_sync = now
+
+                if self.max_bytes and f.tell() >= self.max_bytes:
+                    f = self._rotate(f)
+
+                for waiter in waiters:
+                    waiter.set()
+                if stop:
+                    break
+        except Exception as e:
+            self.failed = e
+            logger.error("Log writer for %s stopped: %s", self.path, e)
+            self._release_waiters()
+        finally:
+            if f is not None:
+                f.close()
+
+    def _release_waiters(self):
+        """Wake flush() callers and drop entries a stopped writer will never write."""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if isinstance(item, threading.Event):
+                item.set()
+
+
+def iter_log_entries(path: str, legacy_path: Optional[str] = None) -> Iterator[Dict]:
+    """Stream logged entries oldest first without loading the whole log.
+
+    Args:
+        path: JSONL log file; rotated files path.N ... path.1 are read first
+        legacy_path: Optional JSON array file written by older versions,
+            read before everything else
+
+    Yields:
+        Logged entries as dicts
+    """
+    if legacy_path and os.path.exists(legacy_path):
+        try:
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                yield from json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error("Error reading legacy log %s: %s", legacy_path, e)
+
+    rotated = []
+    i = 1
+    while os.path.exists(f"{path}.{i}"):
+        rotated.append(f"{path}.{i}")
+        i += 1
+
+    for file_path in list(reversed(rotated)) + [path]:
+        if not os.path.exists(file_path):
+            continue
+        with open(file_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # Last line of a log that was cut off by a crash
+                    continue
+
+
+_writers: Dict[str, JsonlLogWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def get_log_writer(path: str, **kwargs) -> JsonlLogWriter:
+    """Return the process-wide writer for a path, creating it on first use.
+
+    Sharing one writer per file keeps lines from different producers from
+    interleaving. A writer that stopped after an error is replaced, so a
+    transient failure (e.g. a full disk) does not end logging for good.
+    """
+    key = os.path.abspath(path)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None or writer.failed is not None:
+            writer = JsonlLogWriter(path, **kwargs)
+            _writers[key] = writer
+        return writer
+
+
+@atexit.register
+def _close_writers():
+    with _writers_lock:
+        for writer in _writers.values():
+            writer.close()
@@ -5,13 +5,21 @@
 from typing import List, Union, Callable, Optional
 import numpy as np
 import threading
+import time
+import bisect
 import multiprocessing
-from faster_whisper import WhisperModel
+from logic.model_pool import get_model_pool
+from logic.audio_buffer import AudioRingBuffer
+from logic.audio_sources import SoundDeviceSource
+from logic.utterance_queue import UtteranceQueue, DROP_OLDEST
+from logic.tracing import get_tracer
+from logic.vad import FFTVoiceDetector, create_voice_detector
+from logic.local_agreement import LocalAgreement
 
 BlockSize = 30
-Vocals = [50, 1000]
 EndBlocks = 33 * 1
 FlushBlocks = 33 * 5
+MergeBlocks = FlushBlocks * 2  # Longest utterance the merge overflow policy builds
 
 def get_optimal_thread_count():
     """Calculate optimal thread count (70% of available CPU cores)."""
@@ -47,6 +55,14 @@ class LiveTranscription:
         input_device: Optional[int] = None,
         input_device_sample_rate: int = 16000,
         vad_filter: bool = True,
+        queue_size: int = 4,
+        overflow_policy: str = DROP_OLDEST,
+        vad_backend="fft",
+        streaming: bool = False,
+        on_partial: Optional[Callable[[str, str], None]] = None,
+        partial_interval_ms: int = 500,
+        max_batch_size: int = 4,
+        max_wait_ms: int = 20,
     ):
         """Initialize live transcription.
         
@@ -61,10 +77,22 @@ class LiveTranscription:
             language: Language code (None for auto-detection)
             task: Task to perform ('transcribe' or 'translate')
             threads: Number of CPU threads to use (default: 70% of available cores)
-            threshold: Voice activity detection threshold
+            threshold: Volume threshold of the 'fft' voice detector
             input_device: Input device index (None for default)
             input_device_sample_rate: Input device sample rate
             vad_filter: Whether to use VAD filter to remove silence
+            queue_size: Maximum number of utterances waiting for the decoder
+            overflow_policy: What to do when the queue is full
+                ('drop_oldest', 'merge' or 'block')
+            vad_backend: Voice detector used to segment utterances ('fft',
+                'silero' or a VoiceDetector instance)
+            streaming: Re-decode the utterance in progress and report
+                interim hypotheses through on_partial
+            on_partial: Callback with (stable text, unstable text) of the
+                utterance in progress; stable text never changes afterwards
+            partial_interval_ms: Minimum new audio between interim decodes
+            max_batch_size: Maximum queued utterances decoded in one batched pass
+            max_wait_ms: How long to wait for more utterances to fill a batch
         """
         self.on_transcription = on_transcription
         self.on_status_update = on_status_update
@@ -81,105 +109,360 @@ class LiveTranscription:
         self.input_device = input_device
         self.input_device_sample_rate = input_device_sample_rate
         self.vad_filter = vad_filter
+        self.queue_size = queue_size
+        self.overflow_policy = overflow_policy
+        self.vad_backend = vad_backend
+        self.voice_detector = None
+        self.streaming = streaming
+        self.on_partial = on_partial
+        self.partial_interval_ms = partial_interval_ms
+        self.agreement = LocalAgreement()
+        self._partial_start = None
+        self._partial_end = 0
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max_wait_ms
+        self._batched_pipeline = None
         
         self.running = False
         self.waiting = 0
-        self.prevblock = self.buffer = np.zeros((0, 1))
+        self.audio_buffer = None
+        self._utterance_start = None
+        self._preroll = None
+        self._preroll_frames = 0
         self.speaking = False
         self.blocks_speaking = 0
-        self.buffers_to_process = []
+        self.utterances = None
         self.transcribe_model = None
         self._thread = None
+        self.source = None
     
     @staticmethod
     def is_available():
         """Check if sounddevice is available."""
         return sounddevice_available
 
+    def _create_voice_detector(self):
+        """Create the configured voice detector, falling back to the FFT heuristic."""
+        threshold = self.threshold if self.vad_backend == "fft" else None
+        try:
+            return create_voice_detector(self.vad_backend, threshold, self.input_device_sample_rate)
+        except Exception as e:
+            self.on_status_update(f"VAD backend '{self.vad_backend}' unavailable ({e}), using FFT detector")
+            return FFTVoiceDetector(self.threshold, self.input_device_sample_rate)
+
     def _is_there_voice(self, indata, frames):
         """Detect if there is voice in the audio data."""
-        freq = (
-            np.argmax(np.abs(np.fft.rfft(indata[:, 0])))
-            * self.input_device_sample_rate
-            / frames
-        )
-        volume = np.sqrt(np.mean(indata**2))
-        
-        return volume > self.threshold and Vocals[0] <= freq <= Vocals[1]
+        with get_tracer().span("live.vad"):
+            return self.voice_detector.is_speech(indata[:, 0])
+    
+    def _allocate_buffers(self):
+        """Preallocate the capture ring buffer and pre-roll block."""
+        block_frames = int(self.input_device_sample_rate * BlockSize / 1000)
+        # Room for a full queue of merged utterances plus the one being
+        # decoded and the one being captured.
+        self.audio_buffer = AudioRingBuffer((MergeBlocks + 1) * block_frames * (self.queue_size + 2))
+        self._preroll = np.zeros(block_frames, dtype=np.float32)
+        self._preroll_frames = 0
+        self._utterance_start = None
     
     def _save_to_process(self):
-        """Save buffer for processing and reset buffer."""
-        self.buffers_to_process.append(self.buffer.copy())
-        self.buffer = np.zeros((0, 1))
+        """Hand a view of the current utterance to the transcription thread."""
+        start = self._utterance_start
+        end = self.audio_buffer.position
+        if start is not None and end > start:
+            self.utterances.put((start, self.audio_buffer.view(start, end)))
+        self._utterance_start = None
         self.speaking = False
     
+    def _merge_utterances(self, older, newer):
+        """Merge two queued utterances into one view if it stays short enough."""
+        start = older[0]
+        end = newer[0] + len(newer[1])
+        max_samples = MergeBlocks * int(self.input_device_sample_rate * BlockSize / 1000)
+        if end - start > max_samples or not self.audio_buffer.is_valid(start):
+            return None
+        return (start, self.audio_buffer.view(start, end))
+    
+    def get_stats(self):
+        """Return queue depth and dropped audio counters."""
+        if self.utterances is None:
+            return {}
+        stats = self.utterances.stats()
+        stats["dropped_seconds"] = round(stats["dropped_samples"] / self.input_device_sample_rate, 3)
+        return stats
+    
+    def _remember_block(self, block):
+        """Keep the latest block as pre-roll for the next utterance."""
+        n = min(len(block), len(self._preroll))
+        self._preroll[:n] = block[-n:]
+        self._preroll_frames = n
+    
+    def flush(self):
+        """Queue the utterance in progress, e.g. when the input has ended."""
+        if self.speaking:
+            self._save_to_process()
+    
+    def _count_speaking_block(self):
+        """Flush the utterance once it reaches FlushBlocks blocks."""
+        self.blocks_speaking -= 1
+        if self.blocks_speaking < 1:
+            self._save_to_process()
+    
     def callback(self, indata, frames, _time, _status):
         """Audio callback for processing microphone input."""
-        if not self.running or not any(indata):
+        if not self.running or not indata.any():
             return
         
+        block = indata[:, 0]
         voice = self._is_there_voice(indata, frames)
         
-        if not voice and not self.speaking:
-            return
-        
         if voice:
-            if self.waiting < 1:
-                self.buffer = self.prevblock.copy()
+            if self._utterance_start is None:
+                self._utterance_start = self.audio_buffer.position
+                if self.waiting < 1 and self._preroll_frames:
+                    self.audio_buffer.write(self._preroll[:self._preroll_frames])
             
-            self.buffer = np.concatenate((self.buffer, indata))
+            self.audio_buffer.write(block)
             self.waiting = EndBlocks
             
             if not self.speaking:
                 self.blocks_speaking = FlushBlocks
             
             self.speaking = True
-        else:
+            self._count_speaking_block()
+        elif self.speaking:
             self.waiting -= 1
             if self.waiting < 1:
                 self._save_to_process()
-                return
             else:
-                self.buffer = np.concatenate((self.buffer, indata))
+                self.audio_buffer.write(block)
+                self._count_speaking_block()
         
-        self.blocks_speaking -= 1
-        if self.blocks_speaking < 1:
-            self._save_to_process()
+        self._remember_block(block)
+    
+    def _decode(self, audio):
+        """Decode one utterance with the greedy live settings."""
+        result = self.transcribe_model.transcribe(
+            audio,
+            task=self.task,
+            language=self.language,
+            vad_filter=self.vad_filter,
+            beam_size=1,
+            best_of=1,
+            patience=0.7,
+            temperature=[0.0],
+            condition_on_previous_text=False,
+            without_timestamps=True,
+            word_timestamps=False,
+        )
+        
+        segments, _ = result
+        return " ".join([segment.text for segment in segments])
+    
+    def _next_batch(self, first):
+        """Collect up to max_batch_size utterances still held in the ring."""
+        batch = []
+        deadline = time.monotonic() + self.max_wait_ms / 1000
+        item = first
+        while item is not None:
+            if self.audio_buffer.is_valid(item[0]):
+                batch.append(item)
+            else:
+                self.utterances.drop(item)
+            if len(batch) >= self.max_batch_size:
+                break
+            item = self.utterances.get(timeout=max(0.0, deadline - time.monotonic()))
+        return batch
+    
+    def _join_utterances(self, batch):
+        """Lay utterances out back to back and return the audio and clip bounds.
+        
+        Utterances captured one after another are adjacent in the ring, so the
+        common case is a single zero-copy view.
+        """
+        clips = []
+        offset = 0
+        contiguous = True
+        for start, audio in batch:
+            if start != batch[0][0] + offset:
+                contiguous = False
+            clips.append({"start": offset, "end": offset + len(audio)})
+            offset += len(audio)
+        
+        first = batch[0][0]
+        if contiguous and offset <= self.audio_buffer.capacity and self.audio_buffer.is_valid(first):
+            return self._stable_audio(first, self.audio_buffer.view(first, first + offset)), clips
+        return np.concatenate([audio for _, audio in batch]), clips
+    
+    def _stable_audio(self, start, audio):
+        """Copy a ring view if the callback could overwrite it during the decode.
+        
+        A view starting at `start` is overwritten once `capacity` more samples
+        have been written. Live decoding runs faster than real time, so a
+        decode finishes before as many new samples arrive as it decodes; a
+        view with less headroom than its own length is copied first.
+        """
+        headroom = self.audio_buffer.capacity - (self.audio_buffer.position - start)
+        if headroom < len(audio):
+            return audio.copy()
+        return audio
+    
+    def _intact(self, batch, audio):
+        """Check that a decoded view was not overwritten; count the batch as dropped if it was."""
+        # Copies and concatenations own their samples; only ring views can change
+        if audio.base is None or self.audio_buffer.is_valid(batch[0][0]):
+            return True
+        for item in batch:
+            self.utterances.drop(item)
+        return False
+    
+    def _decode_batch(self, batch):
+        """Decode several utterances in one batched encoder/decoder pass.
+        
+        Returns:
+            List of texts, one per utterance, or an empty list if the ring
+            overwrote the audio during the decode
+        """
+        if len(batch) == 1:
+            start, audio = batch[0]
+            audio = self._stable_audio(start, audio)
+            text = self._decode(audio)
+            return [text] if self._intact(batch, audio) else []
+        
+        if self._batched_pipeline is None:
+            from faster_whisper import BatchedInferencePipeline
+            self._batched_pipeline = BatchedInferencePipeline(model=self.transcribe_model)
+        
+        audio, clips = self._join_utterances(batch)
+        segments, _ = self._batched_pipeline.transcribe(
+            audio,
+            task=self.task,
+            language=self.language,
+            vad_filter=False,
+            clip_timestamps=clips,
+            batch_size=len(batch),
+            beam_size=1,
+            best_of=1,
+            patience=0.7,
+            temperature=[0.0],
+            condition_on_previous_text=False,
+            without_timestamps=True,
+            word_timestamps=False,
+        )
+        
+        # Segments carry their clip's offset, which maps them back to the utterance
+        offsets = [clip["start"] / self.input_device_sample_rate for clip in clips]
+        texts = [[] for _ in batch]
+        for segment in segments:
+            index = max(0, bisect.bisect_right(offsets, segment.start + 1e-3) - 1)
+            texts[index].append(segment.text)
+        if not self._intact(batch, audio):
+            return []
+        return [" ".join(parts) for parts in texts]
+    
+    def _decode_partial(self):
+        """Re-decode the utterance in progress and report interim text."""
+        start = self._utterance_start
+        end = self.audio_buffer.position
+        if start is None:
+            return
+        
+        if start != self._partial_start:
+            self.agreement.reset()
+            self._partial_start = start
+            self._partial_end = start
+        
+        interval = int(self.input_device_sample_rate * self.partial_interval_ms / 1000)
+        if end - self._partial_end < interval or not self.audio_buffer.is_valid(start):
+            return
+        
+        audio = self.audio_buffer.view(start, end)
+        with get_tracer().span("live.partial", audio_seconds=len(audio) / self.input_device_sample_rate):
+            text = self._decode(audio)
+        if not self.audio_buffer.is_valid(start):
+            # The ring wrapped over the utterance while decoding it
+            return
+        self._partial_end = end
+        stable, unstable = self.agreement.update(text.split())
+        if self.on_partial and (stable or unstable):
+            self.on_partial(" ".join(stable), " ".join(unstable))
+    
+    def decode_next(self, timeout=None):
+        """Decode the next batch of queued utterances.
+        
+        Args:
+            timeout: Seconds to wait for an utterance (None waits forever)
+        
+        Returns:
+            List of texts, one per decoded utterance (empty if the batch
+            was overwritten in the ring and dropped), or None if nothing
+            was queued before the timeout
+        """
+        item = self.utterances.get(timeout=timeout)
+        if item is None:
+            return None
+        
+        batch = self._next_batch(item)
+        if not batch:
+            return []
+        audio_seconds = sum(len(audio) for _, audio in batch) / self.input_device_sample_rate
+        with get_tracer().span("live.decode", audio_seconds=audio_seconds, batch_size=len(batch)):
+            return self._decode_batch(batch)
     
     def _process_buffers(self):
         """Process audio buffers and transcribe them."""
+        timeout = self.partial_interval_ms / 1000 / 2 if self.streaming else 0.5
         try:
             while self.running:
-                if len(self.buffers_to_process) > 0:
-                    _buffer = self.buffers_to_process.pop(0)
-                    try:
-                        result = self.transcribe_model.transcribe(
-                            _buffer.flatten().astype("float32"),
-                            task=self.task,
-                            language=self.language,
-                            vad_filter=self.vad_filter,
-                            beam_size=1,
-                            best_of=1,
-                            patience=0.7,
-                            temperature=[0.0],
-                            condition_on_previous_text=False,
-                            without_timestamps=True,
-                            word_timestamps=False,
-                        )
-                        
-                        segments, _ = result
-                        text = " ".join([segment.text for segment in segments])
-                        
-                        if text.strip():
-                            self.on_transcription(text)
-                    except Exception as e:
-                        self.on_error(f"Transcription error: {str(e)}")
+                try:
+                    texts = self.decode_next(timeout)
+                except Exception as e:
+                    self.on_error(f"Transcription error: {str(e)}")
+                    continue
+                
+                if texts is None:
+                    if self.streaming:
+                        try:
+                            self._decode_partial()
+                        except Exception as e:
+                            self.on_error(f"Interim transcription error: {str(e)}")
+                    continue
+                
+                for text in texts:
+                    if text.strip():
+                        self.on_transcription(text)
         except Exception as e:
             self.on_error(f"Live transcription error: {str(e)}")
     
-    def start(self):
-        """Start live transcription."""
-        if not sounddevice_available:
+    def prepare(self):
+        """Set up voice detection, buffers and the utterance queue.
+        
+        start() calls this after loading the model. Callers that feed
+        callback() and call decode_next() themselves, such as the
+        transcription server, set transcribe_model and call it directly.
+        """
+        self.voice_detector = self._create_voice_detector()
+        self._allocate_buffers()
+        self.agreement.reset()
+        self._partial_start = None
+        self.speaking = False
+        self.waiting = 0
+        self.utterances = UtteranceQueue(
+            maxsize=self.queue_size,
+            policy=self.overflow_policy,
+            merge=self._merge_utterances,
+            size_of=lambda item: len(item[1]),
+        )
+        self.running = True
+    
+    def start(self, source=None):
+        """Start live transcription.
+        
+        Args:
+            source: AudioSource feeding callback(), e.g. a WavReplaySource
+                for headless tests (default: the configured input device)
+        """
+        if source is None and not sounddevice_available:
             self.on_error("sounddevice library is not available")
             return False
         
@@ -197,21 +480,18 @@ class LiveTranscription:
                 model_path = "int8_tiny"
                 self.on_status_update("Using local tiny model")
             
-            self.transcribe_model = WhisperModel(
+            self.transcribe_model = get_model_pool().get(
                 model_path,
                 device=self.device,
-                device_index=self.device_index,
                 compute_type=self.compute_type,
                 cpu_threads=self.threads,
+                device_index=self.device_index,
             )
             
             vad_status = " with VAD filter" if self.vad_filter else ""
             self.on_status_update(f"Live transcription ready (using {self.compute_type}{vad_status}, {self.threads} threads)")
             
-            self.running = True
-            self.buffer = np.zeros((0, 1))
-            self.prevblock = np.zeros((0, 1))
-            self.buffers_to_process = []
+            self.prepare()
             
             self._thread = threading.Thread(
                 target=self._process_buffers,
@@ -219,20 +499,19 @@ class LiveTranscription:
             )
             self._thread.start()
             
-            self.stream = sd.InputStream(
-                channels=1,
-                callback=self.callback,
+            self.source = source if source is not None else SoundDeviceSource(self.input_device)
+            self.source.start(
+                self.callback,
                 blocksize=int(self.input_device_sample_rate * BlockSize / 1000),
                 samplerate=self.input_device_sample_rate,
-                device=self.input_device,
             )
-            self.stream.start()
             
-            device_name = sd.query_devices(device=self.input_device or sd.default.device[0])['name']
-            self.on_status_update(f"Live transcription started on device: {device_name}")
+            self.on_status_update(f"Live transcription started on device: {self.source.name}")
             return True
         except Exception as e:
             self.running = False
+            if self.utterances is not None:
+                self.utterances.close()
             self.on_error(f"Failed to start live transcription: {str(e)}")
             return False
     
@@ -242,9 +521,11 @@ class LiveTranscription:
             return
         
         self.running = False
+        if self.utterances is not None:
+            self.utterances.close()
         
-        if hasattr(self, 'stream') and self.stream:
-            self.stream.stop()
-            self.stream.close()
+        if self.source is not None:
+            self.source.stop()
+            self.source = None
         
         self.on_status_update("Live transcription stopped") 
\ No newline at end of file
@@ -0,0 +1,48 @@
+"""Stable-prefix commitment for interim live transcription hypotheses."""
+import re
+from typing import List, Tuple
+
+_NORMALIZE = re.compile(r"[^\w]+")
+
+
+def _normalize(word):
+    return _NORMALIZE.sub("", word.lower())
+
+
+class LocalAgreement:
+    """LocalAgreement-2 policy for re-decoded, growing utterances.
+
+    Every call to `update` passes the full hypothesis for the utterance so
+    far. Words on which the last two hypotheses agree (after the already
+    committed ones) are committed and never change afterwards; the rest of
+    the newest hypothesis is returned as unstable.
+    """
+
+    def __init__(self):
+        self.committed: List[str] = []
+        self._previous: List[str] = []
+
+    def reset(self):
+        """Start a new utterance."""
+        self.committed = []
+        self._previous = []
+
+    def update(self, words: List[str]) -> Tuple[List[str], List[str]]:
+        """Add a new hypothesis.
+
+        Args:
+            words: Words of the latest hypothesis for the whole utterance
+
+        Returns:
+            Tuple of (committed words, unstable words)
+        """
+        n = len(self.committed)
+        agreed = 0
+        for new, old in zip(words[n:], self._previous[n:]):
+            if _normalize(new) != _normalize(old):
+                break
+            agreed += 1
+
+        self.committed.extend(words[n:n + agreed])
+        self._previous = words
+        return list(self.committed), words[len(self.committed):]
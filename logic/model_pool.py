@@ -0,0 +1,191 @@
+"""Process-wide pool of loaded Whisper models shared by file and live transcription."""
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+DEFAULT_MEMORY_BUDGET_MB = int(os.environ.get("WHISPER_MODEL_POOL_MB", "4096"))
+
+# Approximate resident size (MB) of float32 weights per model size. Quantized
+# compute types are scaled down by COMPUTE_TYPE_FACTORS.
+MODEL_MEMORY_MB = {
+    "tiny": 150,
+    "base": 290,
+    "small": 970,
+    "medium": 3000,
+    "large": 6200,
+    "turbo": 3200,
+}
+
+COMPUTE_TYPE_FACTORS = {
+    "float32": 1.0,
+    "float16": 0.5,
+    "int8_float16": 0.3,
+    "int8_float32": 0.3,
+    "int8": 0.3,
+}
+
+
+def estimate_model_memory(model_name, compute_type):
+    """Estimate the memory a loaded model occupies in MB.
+
+    Local model directories are measured by the size of their weights file,
+    named models are looked up in MODEL_MEMORY_MB.
+
+    Args:
+        model_name: Model size name or path to a CTranslate2 model directory
+        compute_type: Compute type the model is loaded with
+
+    Returns:
+        Estimated size in MB
+    """
+    weights = os.path.join(model_name, "model.bin")
+    if os.path.isfile(weights):
+        return os.path.getsize(weights) / (1024 * 1024)
+
+    size = model_name.split(".")[0].split("-")[0]
+    base_mb = MODEL_MEMORY_MB.get(size, MODEL_MEMORY_MB["medium"])
+    return base_mb * COMPUTE_TYPE_FACTORS.get(compute_type, 1.0)
+
+
+class WhisperModelPool:
+    """Keeps loaded WhisperModel instances resident with LRU eviction.
+
+    Models are keyed by (model name, device, compute_type, cpu_threads,
+    num_workers). When the summed estimated size exceeds the memory budget,
+    the least recently used models are dropped; the model just requested is
+    never evicted.
+    """
+
+    def __init__(self, memory_budget_mb: float = DEFAULT_MEMORY_BUDGET_MB):
+        """Initialize an empty pool.
+
+        Args:
+            memory_budget_mb: Upper bound for the estimated size of resident models
+        """
+        self.memory_budget_mb = memory_budget_mb
+        self._models = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    @staticmethod
+    def make_key(model_name, device="cpu", compute_type="default", cpu_threads=0, num_workers=1):
+        """Build the pool key for a model configuration."""
+        return (model_name, device, compute_type, int(cpu_threads or 0), int(num_workers or 1))
+
+    def get(
+        self,
+        model_name: str,
+        device: str = "cpu",
+        compute_type: str = "default",
+        cpu_threads: int = 0,
+        device_index=0,
+        num_workers: int = 1,
+        on_load=None,
+    ):
+        """Return a loaded model, loading it on first use.
+
+        Args:
+            model_name: Whisper model name or local model path
+            device: Device to run model on (cpu/cuda)
+            compute_type: CTranslate2 compute type
+            cpu_threads: Number of CPU threads (0 lets CTranslate2 decide)
+            device_index: Device index for CUDA
+            num_workers: Number of concurrent transcriptions the model accepts
+            on_load: Optional callback invoked with the model name before a load
+
+        Returns:
+            faster_whisper.WhisperModel instance
+        """
+        key = self.make_key(model_name, device, compute_type, cpu_threads, num_workers)
+
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+                return model
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Load outside the pool lock so other models stay available, but only
+        # once per key even if several threads ask at the same time.
+        with key_lock:
+            with self._lock:
+                model = self._models.get(key)
+                if model is not None:
+                    self._models.move_to_end(key)
+                    return model
+
+            if on_load:
+                on_load(model_name)
+
+            from faster_whisper import WhisperModel
+
+            model = WhisperModel(
+                model_name,
+                device=device,
+                device_index=device_index,
+                compute_type=compute_type,
+                cpu_threads=int(cpu_threads or 0),
+                num_workers=int(num_workers or 1),
+            )
+
+            with self._lock:
+                self._models[key] = model
+                self._sizes[key] = estimate_model_memory(model_name, compute_type)
+                self._evict(keep=key)
+                self._key_locks.pop(key, None)
+            return model
+
+    def contains(self, model_name, device="cpu", compute_type="default", cpu_threads=0, num_workers=1):
+        """Check whether a model configuration is already resident."""
+        key = self.make_key(model_name, device, compute_type, cpu_threads, num_workers)
+        with self._lock:
+            return key in self._models
+
+    def used_memory_mb(self):
+        """Return the summed estimated size of resident models in MB."""
+        with self._lock:
+            return sum(self._sizes.values())
+
+    def set_memory_budget(self, memory_budget_mb: float):
+        """Change the memory budget and evict models that no longer fit."""
+        with self._lock:
+            self.memory_budget_mb = memory_budget_mb
+            self._evict()
+
+    def evict(self, model_name, device="cpu", compute_type="default", cpu_threads=0, num_workers=1):
+        """Drop a specific model configuration from the pool."""
+        key = self.make_key(model_name, device, compute_type, cpu_threads, num_workers)
+        with self._lock:
+            self._models.pop(key, None)
+            self._sizes.pop(key, None)
+
+    def clear(self):
+        """Drop all resident models."""
+        with self._lock:
+            self._models.clear()
+            self._sizes.clear()
+
+    def _evict(self, keep=None):
+        """Evict least recently used models until the budget is met (lock held)."""
+        for key in list(self._models.keys()):
+            if sum(self._sizes.values()) <= self.memory_budget_mb:
+                break
+            if key == keep:
+                continue
+            del self._models[key]
+            del self._sizes[key]
+
+
+_pool: Optional[WhisperModelPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_model_pool():
+    """Return the process-wide model pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = WhisperModelPool()
+        return _pool
@@ -0,0 +1,60 @@
+"""Lazily loaded, process-wide spaCy pipelines."""
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "en_core_web_sm"
+
+# Components of en_core_web_sm that tokenization and lexical attributes
+# such as is_punct do not need.
+PIPELINE_COMPONENTS = ("tok2vec", "tagger", "parser", "senter", "attribute_ruler", "lemmatizer", "ner")
+TOKENIZER_ONLY = PIPELINE_COMPONENTS
+
+_pipelines = {}
+_lock = threading.Lock()
+
+
+def get_pipeline(exclude=TOKENIZER_ONLY, name=MODEL_NAME):
+    """Return the shared pipeline, loading it on first use.
+
+    Pipelines are cached per (name, excluded components), so every caller
+    asking for the same configuration gets the same object.
+
+    Args:
+        exclude: Components not to load (default: all, i.e. tokenizer only)
+        name: spaCy model package name
+
+    Returns:
+        spacy.Language instance
+    """
+    key = (name, tuple(sorted(exclude)))
+    with _lock:
+        nlp = _pipelines.get(key)
+        if nlp is None:
+            import spacy
+            try:
+                nlp = spacy.load(name, exclude=list(exclude))
+            except Exception as e:
+                logger.error(f"Error loading spaCy model: {e}. Run 'python -m spacy download {name}'")
+                raise
+            _pipelines[key] = nlp
+        return nlp
+
+
+def warm_up(exclude=TOKENIZER_ONLY, name=MODEL_NAME):
+    """Load a pipeline in a background thread so the first request is fast.
+
+    Returns:
+        The started thread
+    """
+    def _load():
+        try:
+            get_pipeline(exclude, name)
+        except Exception:
+            # Already logged; the next real use reports the error again
+            pass
+
+    thread = threading.Thread(target=_load, daemon=True)
+    thread.start()
+    return thread
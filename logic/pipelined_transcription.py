@@ -0,0 +1,157 @@
+"""Transcribe a recording window by window while it is still being recorded."""
+import queue
+import threading
+
+import numpy as np
+
+_FINISH = object()
+_CANCEL = object()
+
+
+class RecordingTranscriber:
+    """Decodes completed windows of a running recording on a warm model.
+
+    Blocks from the recorder are collected into fixed-size windows (30 s,
+    Whisper's native input length). Each full window is decoded on a worker
+    thread while recording continues, so when the user stops only the last
+    partial window remains. Windows are cut at the quietest 100 ms in their
+    last two seconds to avoid splitting words, and the previous window's
+    text is passed as prompt to keep context across the cut.
+    """
+
+    split_search_seconds = 2.0
+    split_frame_seconds = 0.1
+
+    def __init__(
+        self,
+        get_model,
+        on_segment=None,
+        on_result=None,
+        on_status_update=None,
+        on_error=None,
+        on_complete=None,
+        sample_rate=16000,
+        window_seconds=30,
+        transcribe_options=None,
+    ):
+        """Initialize the session.
+
+        Args:
+            get_model: Callable returning a loaded WhisperModel
+            on_segment: Callback for each decoded segment dict (start, end, text)
+            on_result: Callback with the full transcript after finish()
+            on_status_update: Callback for status updates
+            on_error: Callback for error handling
+            on_complete: Callback when the session is done
+            sample_rate: Sample rate of the recorded blocks
+            window_seconds: Length of the windows decoded while recording
+            transcribe_options: Extra keyword arguments for model.transcribe
+        """
+        self.get_model = get_model
+        self.on_segment = on_segment
+        self.on_result = on_result
+        self.on_status_update = on_status_update
+        self.on_error = on_error
+        self.on_complete = on_complete
+        self.sample_rate = sample_rate
+        self.transcribe_options = transcribe_options or {}
+
+        self._window = np.zeros(int(window_seconds * sample_rate), dtype=np.float32)
+        self._filled = 0
+        self._windows = queue.Queue()
+        self._thread = None
+        self.texts = []
+        self.windows_decoded = 0
+
+    def start(self):
+        """Start the worker, which loads (or reuses) the model right away."""
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+        self._thread.start()
+
+    def feed(self, block):
+        """Add a recorded block of shape (frames,) or (frames, channels)."""
+        samples = block[:, 0] if block.ndim > 1 else block
+        offset = 0
+        while offset < len(samples):
+            take = min(len(self._window) - self._filled, len(samples) - offset)
+            self._window[self._filled:self._filled + take] = samples[offset:offset + take]
+            self._filled += take
+            offset += take
+            if self._filled == len(self._window):
+                self._emit_window()
+
+    def _emit_window(self):
+        """Queue the full window up to a quiet split point, keep the rest."""
+        split = self._find_split()
+        self._windows.put(self._window[:split].copy())
+        remainder = self._filled - split
+        self._window[:remainder] = self._window[split:self._filled]
+        self._filled = remainder
+
+    def _find_split(self):
+        """Return the start of the quietest frame near the end of the window."""
+        frame = int(self.split_frame_seconds * self.sample_rate)
+        search = int(self.split_search_seconds * self.sample_rate)
+        tail = self._window[self._filled - search:self._filled]
+        frames = tail[:len(tail) // frame * frame].reshape(-1, frame)
+        if not len(frames):
+            return self._filled
+        quietest = int(np.argmin(np.mean(frames**2, axis=1)))
+        return self._filled - search + quietest * frame
+
+    def finish(self):
+        """Queue the last partial window; the result is reported when decoded."""
+        if self._filled:
+            self._windows.put(self._window[:self._filled].copy())
+            self._filled = 0
+        self._windows.put(_FINISH)
+
+    def cancel(self):
+        """Stop without reporting a result."""
+        self._windows.put(_CANCEL)
+
+    def _worker(self):
+        try:
+            model = self.get_model()
+        except Exception as e:
+            if self.on_error:
+                self.on_error(str(e))
+            if self.on_complete:
+                self.on_complete()
+            return
+
+        offset = 0.0
+        while True:
+            window = self._windows.get()
+            if window is _CANCEL:
+                return
+            if window is _FINISH:
+                break
+            try:
+                prompt = self.texts[-1][-200:] if self.texts else None
+                segments, _ = model.transcribe(window, initial_prompt=prompt, **self.transcribe_options)
+                window_texts = []
+                for segment in segments:
+                    window_texts.append(segment.text)
+                    if self.on_segment:
+                        self.on_segment({
+                            "start": offset + segment.start,
+                            "end": offset + segment.end,
+                            "text": segment.text,
+                        })
+                self.texts.append(" ".join(window_texts))
+                self.windows_decoded += 1
+            except Exception as e:
+                if self.on_error:
+                    self.on_error(str(e))
+            offset += len(window) / self.sample_rate
+
+        if self.on_result:
+            self.on_result(" ".join(text for text in self.texts if text))
+        if self.on_status_update:
+            if self.transcribe_options.get("task") == "translate":
+                self.on_status_update("Translation complete!")
+            else:
+                self.on_status_update("Transcription complete!")
+        if self.on_complete:
+            self.on_complete()
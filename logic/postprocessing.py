@@ -0,0 +1,546 @@
+"""Staged, threaded post-processing of transcript segments.
+
+Segments go through a chain of stages (normalization, corrections, entity
+extraction, intent classification, export), each running in its own
+worker thread and connected by bounded queues. Submitting a segment only
+enqueues it, so a slow stage (e.g. a CSV on a network share) never holds
+up the caller or the transcript display; results arrive through the
+`on_result` callback once the last stage is done.
+
+The chain is read from a JSON file (postprocessing.json by default):
+
+    {
+        "queue_size": 64,
+        "overflow_policy": "drop_oldest",
+        "stages": [
+            {"type": "normalize"},
+            {"type": "correct", "path": "corrections.json", "terms_path": "correction_terms.txt"},
+            {"type": "extract", "scope": "session"},
+            {"type": "intent", "scope": "session"},
+            {"type": "export", "format": "jsonl", "path": "entities_intents.jsonl"},
+            {"type": "export", "format": "csv", "path": "maintenance_entities.csv"}
+        ]
+    }
+
+Usage (stages and per-stage throughput/latency for a text file, one
+segment per line):
+    python -m logic.postprocessing transcript.txt --config postprocessing.json
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+import time
+import unicodedata
+from collections import deque
+
+from logic.jsonl_log import get_log_writer
+from logic.tracing import get_tracer, percentile
+from logic.utterance_queue import BLOCK, DROP_OLDEST, UtteranceQueue
+
+CONFIG_FILE = "postprocessing.json"
+
+DEFAULT_CONFIG = {
+    "queue_size": 64,
+    "overflow_policy": DROP_OLDEST,
+    "stages": [
+        {"type": "normalize"},
+        {"type": "correct", "path": "corrections.json", "terms_path": "correction_terms.txt"},
+        {"type": "extract", "scope": "session"},
+        {"type": "intent", "scope": "session"},
+        {"type": "export", "format": "jsonl", "path": "entities_intents.jsonl"},
+    ],
+}
+
+SCOPES = ("session", "segment")
+
+
+def _text_size(item):
+    return len(item["text"])
+
+
+def _percentile_ms(seconds, q):
+    """Percentile in milliseconds, 0.0 while nothing has been measured."""
+    value = percentile(seconds, q)
+    return round(value * 1000, 3) if value is not None else 0.0
+
+
+class Stage:
+    """One step of the pipeline; subclasses implement `process`."""
+
+    type = None
+
+    def __init__(self, pipeline, name=None):
+        """Initialize the stage.
+
+        Args:
+            pipeline: PostProcessingPipeline the stage belongs to
+            name: Name used in stats and traces (default: the stage type)
+        """
+        self.pipeline = pipeline
+        self.name = name or self.type
+        self.processed = 0
+        self.filtered = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.latencies = deque(maxlen=1024)
+
+    def process(self, item):
+        """Transform item in place or return a new one; None drops it."""
+        raise NotImplementedError
+
+    def reset(self):
+        """Forget per-session state; called before the first item of a new session."""
+
+    def close(self):
+        """Release files or other resources."""
+
+    def stats(self):
+        latencies = list(self.latencies)
+        return {
+            "processed": self.processed,
+            "filtered": self.filtered,
+            "errors": self.errors,
+            "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+            "p95_ms": _percentile_ms(latencies, 95),
+            "items_per_s": round(self.processed / self.busy_seconds, 1) if self.busy_seconds else 0.0,
+        }
+
+
+class NormalizeStage(Stage):
+    """Unicode NFC, collapsed whitespace; drops empty segments."""
+
+    type = "normalize"
+
+    def __init__(self, pipeline, lowercase=False, **kwargs):
+        super().__init__(pipeline, **kwargs)
+        self.lowercase = lowercase
+
+    def process(self, item):
+        text = " ".join(unicodedata.normalize("NFC", item["text"]).split())
+        if self.lowercase:
+            text = text.lower()
+        if not text:
+            return None
+        item["text"] = text
+        return item
+
+
+class CorrectionStage(Stage):
+    """Fixes known misrecognitions and domain terms with a CorrectionEngine."""
+
+    type = "correct"
+
+    def __init__(self, pipeline, path="corrections.json", terms_path="correction_terms.txt", **kwargs):
+        """Compile the corrections.
+
+        Args:
+            pipeline: PostProcessingPipeline the stage belongs to
+            path: JSON file of raw -> corrected pairs
+            terms_path: Term list file (one term per line)
+            **kwargs: Stage name and CorrectionEngine options (max_distance,
+                min_fuzzy_length, max_term_tokens, derive)
+        """
+        from logic.correction_engine import CorrectionEngine
+
+        super().__init__(pipeline, name=kwargs.pop("name", None))
+        self.engine = CorrectionEngine.from_files(path, terms_path, **kwargs)
+
+    def process(self, item):
+        text, corrections = self.engine.correct(item["text"])
+        if corrections:
+            item.setdefault("raw_text", item["text"])
+            item["text"] = text
+            item["corrections"] = item.get("corrections", []) + [correction._asdict() for correction in corrections]
+        return item
+
+
+class ExtractStage(Stage):
+    """Entity extraction, per segment or over the running session transcript."""
+
+    type = "extract"
+
+    def __init__(self, pipeline, scope="session", **kwargs):
+        super().__init__(pipeline, **kwargs)
+        if scope not in SCOPES:
+            raise ValueError(f"Unknown extraction scope '{scope}', expected one of {SCOPES}")
+        self.scope = scope
+        self.incremental = None
+        if scope == "session":
+            from logic.incremental_extraction import IncrementalExtractor
+            self.incremental = IncrementalExtractor(pipeline.extractor)
+
+    def process(self, item):
+        if self.incremental is not None:
+            result = self.incremental.feed(item["text"], log=False)
+            item["entities"] = result["entities"]
+            item["spans"] = result["new_spans"]
+        else:
+            result = self.pipeline.extractor.extract(self.pipeline.extractor.preprocess(item["text"]))
+            item["entities"] = result["entities"]
+            item["spans"] = result["spans"]
+        return item
+
+    def reset(self):
+        if self.incremental is not None:
+            self.incremental.reset()
+
+
+class IntentStage(Stage):
+    """Intent from the keyword spans found by the extract stage.
+
+    In session scope the intent covers every keyword seen since the last
+    reset, matching what a scan of the whole transcript would report.
+    """
+
+    type = "intent"
+
+    def __init__(self, pipeline, scope="session", **kwargs):
+        super().__init__(pipeline, **kwargs)
+        if scope not in SCOPES:
+            raise ValueError(f"Unknown intent scope '{scope}', expected one of {SCOPES}")
+        self.scope = scope
+        self.engine = pipeline.extractor.engine
+        self.seen = set()
+
+    def process(self, item):
+        if "spans" in item:
+            intents = {span["label"] for span in item["spans"] if span["kind"] == "intent"}
+        else:
+            text = self.pipeline.extractor.preprocess(item["text"])
+            intents = {span.label for span in self.engine.intent_spans(text)}
+        if self.scope == "session":
+            self.seen |= intents
+            intents = self.seen
+        item["intent"] = self.engine.best_of(intents)
+        return item
+
+    def reset(self):
+        self.seen = set()
+
+
+class ExportStage(Stage):
+    """Appends one record per segment to a JSONL or CSV file."""
+
+    type = "export"
+    formats = ("jsonl", "csv")
+
+    def __init__(self, pipeline, format="jsonl", path=None, columns=None, **kwargs):
+        if format not in self.formats:
+            raise ValueError(f"Unknown export format '{format}', expected one of {self.formats}")
+        kwargs.setdefault("name", f"export_{format}")
+        super().__init__(pipeline, **kwargs)
+        self.format = format
+        self.path = path or f"postprocessed.{format}"
+        self.columns = columns
+        self._file = None
+        self._writer = None
+
+    def _record(self, item):
+        record = {
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(item["submitted_at"])),
+            "transcription": item["text"],
+            "entities": item.get("entities"),
+            "intent": item.get("intent"),
+        }
+        if "raw_text" in item:
+            record["raw_transcription"] = item["raw_text"]
+        return record
+
+    def _open_csv(self):
+        columns = self.columns
+        exists = os.path.exists(self.path) and os.path.getsize(self.path) > 0
+        if columns is None and exists:
+            # Append in the layout the file already has
+            with open(self.path, "r", encoding="utf-8", errors="replace", newline="") as f:
+                columns = next(csv.reader(f), None)
+        if not columns:
+            columns = ["timestamp", "transcription", "intent"] + list(self.pipeline.extractor.patterns)
+        self.columns = columns
+        self._file = open(self.path, "a", encoding="utf-8", newline="")
+        self._writer = csv.DictWriter(self._file, fieldnames=columns, extrasaction="ignore")
+        if not exists:
+            self._writer.writeheader()
+
+    def process(self, item):
+        record = self._record(item)
+        if self.format == "jsonl":
+            get_log_writer(self.path).write(record)
+            return item
+
+        if self._writer is None:
+            self._open_csv()
+        row = dict(record, **(record["entities"] or {}))
+        del row["entities"]
+        self._writer.writerow(row)
+        self._file.flush()
+        return item
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._writer = None
+
+
+STAGE_TYPES = {stage.type: stage for stage in (NormalizeStage, CorrectionStage, ExtractStage, IntentStage, ExportStage)}
+
+
+def load_config(path=CONFIG_FILE):
+    """Read a pipeline configuration, falling back to DEFAULT_CONFIG if the file is missing."""
+    if path is None or not os.path.exists(path):
+        return json.loads(json.dumps(DEFAULT_CONFIG))
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class PostProcessingPipeline:
+    """Runs transcript segments through configured stages, one thread per stage.
+
+    The queue in front of the first stage uses `overflow_policy`
+    (drop_oldest by default), so `submit` never blocks; queues between
+    stages block, so a slow stage backs up the ones before it instead of
+    losing segments. `reset()` starts a new session: stateful stages
+    (session-scope extraction and intent) reset when the first segment of
+    the new session reaches them, in order with everything before it.
+    """
+
+    def __init__(self, stages, extractor=None, on_result=None, on_error=None, queue_size=64, overflow_policy=DROP_OLDEST):
+        """Build the stages.
+
+        Args:
+            stages: List of stage configs, each a dict with "type" and the
+                stage's options
+            extractor: EntityExtractor shared by the extract and intent stages
+                (default: a new one)
+            on_result: Callback with each item dict after the last stage
+            on_error: Callback(stage name, exception) when a stage fails;
+                the item is dropped
+            queue_size: Capacity of each queue in front of a stage
+            overflow_policy: Policy of the first queue when it is full
+        """
+        if extractor is None:
+            from logic.entity_extractor import EntityExtractor
+            extractor = EntityExtractor()
+        self.extractor = extractor
+        self.on_result = on_result
+        self.on_error = on_error
+
+        self.stages = []
+        names = set()
+        for config in stages:
+            config = dict(config)
+            stage_type = config.pop("type")
+            if stage_type not in STAGE_TYPES:
+                raise ValueError(f"Unknown stage type '{stage_type}', expected one of {list(STAGE_TYPES)}")
+            stage = STAGE_TYPES[stage_type](self, **config)
+            if stage.name in names:
+                stage.name = f"{stage.name}_{len(self.stages)}"
+            names.add(stage.name)
+            self.stages.append(stage)
+
+        self._queues = [
+            UtteranceQueue(queue_size, policy=overflow_policy if index == 0 else BLOCK, size_of=_text_size)
+            for index in range(len(self.stages))
+        ]
+        self._threads = []
+        self._session = 0
+        self._sessions = [0] * len(self.stages)
+        self._lock = threading.Condition()
+        self.submitted = 0
+        self.completed = 0
+        self.end_to_end = deque(maxlen=1024)
+        self._closing = False
+
+    @classmethod
+    def from_config(cls, path=CONFIG_FILE, **kwargs):
+        """Create a pipeline from a JSON configuration file (see module docstring)."""
+        config = load_config(path)
+        return cls(
+            config["stages"],
+            queue_size=config.get("queue_size", 64),
+            overflow_policy=config.get("overflow_policy", DROP_OLDEST),
+            **kwargs,
+        )
+
+    def start(self):
+        """Start one worker thread per stage."""
+        for index, stage in enumerate(self.stages):
+            thread = threading.Thread(target=self._run, args=(index,), name=f"postprocess-{stage.name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def submit(self, text, **fields):
+        """Queue a transcript segment without waiting for any stage.
+
+        Args:
+            text: Segment text
+            **fields: Extra values carried along in the item dict
+
+        Returns:
+            False if the pipeline is closed
+        """
+        item = dict(fields, text=text, session=self._session, submitted_at=time.time(), submitted=time.perf_counter())
+        with self._lock:
+            self.submitted += 1
+        if not self.stages:
+            self._finish(item)
+            return True
+        return self._queues[0].put(item)
+
+    def reset(self):
+        """Start a new session for stages that keep state across segments."""
+        self._session += 1
+
+    def flush(self, timeout=None):
+        """Wait until every submitted segment has left the pipeline.
+
+        Returns:
+            False on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while self.completed + self._dropped() < self.submitted:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._lock.wait(remaining)
+        return True
+
+    def _dropped(self):
+        return self._queues[0].dropped_utterances if self._queues else 0
+
+    def close(self):
+        """Process what is queued, then stop the workers and close the stages."""
+        self._closing = True
+        if self._queues:
+            self._queues[0].close()
+        for thread in self._threads:
+            thread.join()
+        for stage in self.stages:
+            stage.close()
+
+    def _run(self, index):
+        stage = self.stages[index]
+        inbox = self._queues[index]
+        outbox = self._queues[index + 1] if index + 1 < len(self._queues) else None
+        while True:
+            item = inbox.get()
+            if item is None:
+                if self._closing and not len(inbox):
+                    break
+                continue
+
+            if item["session"] != self._sessions[index]:
+                self._sessions[index] = item["session"]
+                stage.reset()
+
+            started = time.perf_counter()
+            try:
+                with get_tracer().span(f"postprocess.{stage.name}"):
+                    result = stage.process(item)
+            except Exception as e:
+                result = None
+                stage.errors += 1
+                print(f"Post-processing stage {stage.name} failed: {e}")
+                if self.on_error:
+                    self.on_error(stage.name, e)
+            else:
+                if result is None:
+                    stage.filtered += 1
+            elapsed = time.perf_counter() - started
+            stage.processed += 1
+            stage.busy_seconds += elapsed
+            stage.latencies.append(elapsed)
+
+            if result is None:
+                self._done()
+            elif outbox is not None:
+                outbox.put(result)
+            else:
+                self._finish(result)
+
+        if outbox is not None:
+            outbox.close()
+
+    def _finish(self, item):
+        self.end_to_end.append(time.perf_counter() - item["submitted"])
+        if self.on_result:
+            try:
+                self.on_result(item)
+            except Exception as e:
+                print(f"Post-processing result callback failed: {e}")
+        self._done()
+
+    def _done(self):
+        with self._lock:
+            self.completed += 1
+            self._lock.notify_all()
+
+    def stats(self):
+        """Return per-stage counters, latency and throughput plus queue state."""
+        end_to_end = list(self.end_to_end)
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "end_to_end_p50_ms": _percentile_ms(end_to_end, 50),
+            "end_to_end_p95_ms": _percentile_ms(end_to_end, 95),
+            "stages": {
+                stage.name: dict(stage.stats(), queue=queue.stats())
+                for stage, queue in zip(self.stages, self._queues)
+            },
+        }
+
+    def format_stats(self):
+        """Return stats as a table, one row per stage."""
+        stats = self.stats()
+        lines = [
+            f"{'stage':<16} {'items':>7} {'errors':>6} {'mean ms':>9} {'p95 ms':>9} {'items/s':>10} {'max depth':>9} {'dropped':>7}"
+        ]
+        for name, row in stats["stages"].items():
+            lines.append(
+                f"{name:<16} {row['processed']:>7} {row['errors']:>6} {row['mean_ms']:>9.3f} {row['p95_ms']:>9.3f} "
+                f"{row['items_per_s']:>10.1f} {row['queue']['max_depth']:>9} {row['queue']['dropped_utterances']:>7}"
+            )
+        lines.append(
+            f"end to end: {stats['completed']}/{stats['submitted']} segments, "
+            f"p50 {stats['end_to_end_p50_ms']:.3f} ms, p95 {stats['end_to_end_p95_ms']:.3f} ms"
+        )
+        return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run transcript segments through the post-processing pipeline.")
+    parser.add_argument("input", nargs="?", help="Text file with one segment per line (default: stdin)")
+    parser.add_argument("--config", default=CONFIG_FILE, help="Pipeline configuration file")
+    parser.add_argument("--print", action="store_true", help="Print each result")
+    args = parser.parse_args(argv)
+
+    def on_result(item):
+        if args.print:
+            print(json.dumps({key: item.get(key) for key in ("text", "entities", "intent")}, ensure_ascii=False))
+
+    config = load_config(args.config)
+    # Block instead of dropping: a file can be read faster than any stage
+    config["overflow_policy"] = BLOCK
+    pipeline = PostProcessingPipeline(
+        config["stages"],
+        on_result=on_result,
+        queue_size=config.get("queue_size", 64),
+        overflow_policy=config["overflow_policy"],
+    ).start()
+
+    source = open(args.input, "r", encoding="utf-8") if args.input else sys.stdin
+    with source:
+        for line in source:
+            if line.strip():
+                pipeline.submit(line)
+    pipeline.close()
+    print(pipeline.format_stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Optional startup instrumentation: per-import and per-constructor timings.
+
+Enable with the environment variable WHISPER_PROFILE_STARTUP=1 (or
+`python main.py --profile-startup`). The report is written to
+startup_profile.json once the first frame has been rendered.
+"""
+import builtins
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+REPORT_FILE = "startup_profile.json"
+
+
+class StartupProfiler:
+    """Collects import and span timings relative to profiler creation."""
+
+    def __init__(self, enabled=False, report_file=REPORT_FILE):
+        self.enabled = enabled
+        self.report_file = report_file
+        self.started = time.perf_counter()
+        self.imports = []
+        self.spans = []
+        self.marks = {}
+        self._original_import = None
+        self._import_stack = []
+        self._thread_id = threading.get_ident()
+
+    def install_import_hook(self):
+        """Time every first-time import made on the main thread."""
+        if not self.enabled or self._original_import is not None:
+            return
+        self._original_import = builtins.__import__
+        original = self._original_import
+        profiler = self
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if level or name in sys.modules or threading.get_ident() != profiler._thread_id:
+                return original(name, globals, locals, fromlist, level)
+
+            frame = {"child_s": 0.0}
+            profiler._import_stack.append(frame)
+            start = time.perf_counter()
+            try:
+                return original(name, globals, locals, fromlist, level)
+            finally:
+                elapsed = time.perf_counter() - start
+                profiler._import_stack.pop()
+                if profiler._import_stack:
+                    profiler._import_stack[-1]["child_s"] += elapsed
+                profiler.imports.append({
+                    "module": name,
+                    "cumulative_s": round(elapsed, 4),
+                    "self_s": round(elapsed - frame["child_s"], 4),
+                    "depth": len(profiler._import_stack),
+                })
+
+        builtins.__import__ = timed_import
+
+    def remove_import_hook(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    @contextmanager
+    def span(self, name):
+        """Time a block such as a constructor."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans.append({
+                "name": name,
+                "start_s": round(start - self.started, 4),
+                "duration_s": round(time.perf_counter() - start, 4),
+            })
+
+    def mark(self, name):
+        """Record a point in time, e.g. when the first frame was rendered."""
+        if self.enabled:
+            self.marks[name] = round(time.perf_counter() - self.started, 4)
+
+    def report(self):
+        """Build the report dict."""
+        top_level = [entry for entry in self.imports if entry["depth"] == 0]
+        return {
+            "marks": self.marks,
+            "spans": self.spans,
+            "imports": sorted(top_level, key=lambda entry: entry["cumulative_s"], reverse=True),
+            "slowest_modules": sorted(self.imports, key=lambda entry: entry["self_s"], reverse=True)[:25],
+        }
+
+    def write_report(self):
+        """Write the report to disk and print a short summary."""
+        if not self.enabled:
+            return None
+        self.remove_import_hook()
+        report = self.report()
+        try:
+            with open(self.report_file, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+        except Exception as e:
+            print(f"Error writing startup profile: {e}")
+
+        print(f"Startup profile written to {self.report_file}")
+        for name, at in self.marks.items():
+            print(f"  {name}: {at:.3f}s")
+        for span in self.spans:
+            print(f"  {span['name']}: {span['duration_s']:.3f}s")
+        return report
+
+
+_profiler = StartupProfiler(enabled=os.environ.get("WHISPER_PROFILE_STARTUP") == "1")
+
+
+def get_profiler():
+    """Return the process-wide startup profiler (disabled unless requested)."""
+    return _profiler
+
+
+def enable(report_file=REPORT_FILE):
+    """Turn profiling on, e.g. from a command line flag."""
+    _profiler.enabled = True
+    _profiler.report_file = report_file
+    _profiler.install_import_hook()
+    return _profiler
+
+
+if _profiler.enabled:
+    _profiler.install_import_hook()
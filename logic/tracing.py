@@ -0,0 +1,179 @@
+"""Lightweight per-stage latency tracing.
+
+Wrap a stage in `get_tracer().span("stage")`; each finished span is kept
+for the summary and, when tracing is enabled, appended to trace.jsonl.
+Spans given `audio_seconds` also report their real-time factor (processing
+time divided by audio duration, below 1.0 is faster than real time).
+
+Enable with the environment variable WHISPER_TRACE=1 (or
+`python main.py --trace`); disabled spans cost one attribute check. The
+summary is printed when the process exits.
+"""
+import atexit
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+from logic.jsonl_log import get_log_writer
+
+TRACE_FILE = "trace.jsonl"
+
+# Durations kept per stage for the percentile summary
+HISTORY_SIZE = 2048
+
+
+def percentile(values, q):
+    """Return the q-th percentile (0-100) of values by linear interpolation."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class Tracer:
+    """Records span durations per stage and exports them as JSONL."""
+
+    def __init__(self, enabled=False, path=TRACE_FILE, history_size=HISTORY_SIZE):
+        """Initialize the tracer.
+
+        Args:
+            enabled: Record spans (otherwise span() is a no-op)
+            path: JSONL file spans are appended to (None to keep them in memory only)
+            history_size: Number of recent spans per stage used for summaries
+        """
+        self.enabled = enabled
+        self.path = path
+        self.history_size = history_size
+        self._durations = defaultdict(lambda: deque(maxlen=self.history_size))
+        self._rtfs = defaultdict(lambda: deque(maxlen=self.history_size))
+        self._lock = threading.Lock()
+        self._writer = None
+
+    @contextmanager
+    def span(self, stage, audio_seconds=None, **attrs):
+        """Time the enclosed block as one occurrence of stage.
+
+        Args:
+            stage: Stage name, e.g. 'model.load' or 'live.decode'
+            audio_seconds: Duration of the audio processed, for the
+                real-time factor (optional)
+            **attrs: Extra JSON-serializable fields for the exported span
+
+        Yields:
+            Dict of attributes that may be extended inside the block, e.g.
+            to set audio_seconds once it is known
+        """
+        if not self.enabled:
+            yield attrs
+            return
+
+        if audio_seconds is not None:
+            attrs["audio_seconds"] = audio_seconds
+        start = time.perf_counter()
+        try:
+            yield attrs
+        finally:
+            self.record(stage, time.perf_counter() - start, start=start, **attrs)
+
+    def record(self, stage, duration, start=None, **attrs):
+        """Record a duration (seconds) measured elsewhere."""
+        if not self.enabled:
+            return
+
+        audio_seconds = attrs.get("audio_seconds")
+        rtf = duration / audio_seconds if audio_seconds else None
+        with self._lock:
+            self._durations[stage].append(duration)
+            if rtf is not None:
+                self._rtfs[stage].append(rtf)
+
+        if self.path:
+            entry = {
+                "stage": stage,
+                "start": start if start is not None else time.perf_counter() - duration,
+                "duration_ms": round(duration * 1000, 3),
+                "thread": threading.current_thread().name,
+            }
+            if rtf is not None:
+                entry["rtf"] = round(rtf, 4)
+            entry.update(attrs)
+            try:
+                self._get_writer().write(entry)
+            except OSError:
+                # The writer already logged why it stopped; tracing must
+                # never break the code it measures
+                pass
+
+    def _get_writer(self):
+        if self._writer is None or self._writer.failed is not None:
+            self._writer = get_log_writer(self.path)
+        return self._writer
+
+    def summary(self):
+        """Return per-stage count and p50/p95/p99 latency, plus RTF where known.
+
+        Returns:
+            Dict mapping stage name to a dict of statistics (milliseconds)
+        """
+        with self._lock:
+            durations = {stage: list(values) for stage, values in self._durations.items()}
+            rtfs = {stage: list(values) for stage, values in self._rtfs.items()}
+
+        result = {}
+        for stage, values in sorted(durations.items()):
+            ms = [value * 1000 for value in values]
+            stats = {
+                "count": len(ms),
+                "mean_ms": sum(ms) / len(ms),
+                "p50_ms": percentile(ms, 50),
+                "p95_ms": percentile(ms, 95),
+                "p99_ms": percentile(ms, 99),
+            }
+            if rtfs.get(stage):
+                stats["rtf_p50"] = percentile(rtfs[stage], 50)
+                stats["rtf_p95"] = percentile(rtfs[stage], 95)
+            result[stage] = stats
+        return result
+
+    def format_summary(self):
+        """Return the summary as a text table."""
+        lines = [f"{'stage':<24}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'RTF p50':>9}"]
+        for stage, stats in self.summary().items():
+            rtf = f"{stats['rtf_p50']:.3f}" if "rtf_p50" in stats else "-"
+            lines.append(
+                f"{stage:<24}{stats['count']:>7}{stats['p50_ms']:>10.1f}"
+                f"{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}{rtf:>9}"
+            )
+        return "\n".join(lines)
+
+    def reset(self):
+        """Forget the collected durations (the JSONL export is kept)."""
+        with self._lock:
+            self._durations.clear()
+            self._rtfs.clear()
+
+
+_tracer = Tracer(enabled=os.environ.get("WHISPER_TRACE") == "1")
+
+
+def get_tracer():
+    """Return the process-wide tracer (disabled unless WHISPER_TRACE=1)."""
+    return _tracer
+
+
+def enable(path=TRACE_FILE):
+    """Turn tracing on, e.g. from a command line flag or a benchmark."""
+    _tracer.enabled = True
+    _tracer.path = path
+    return _tracer
+
+
+@atexit.register
+def _print_summary():
+    if _tracer.enabled and _tracer.summary():
+        print(_tracer.format_summary())
@@ -0,0 +1,217 @@
+"""Persistent, content-addressed cache of transcription results.
+
+Entries are keyed by a hash of the audio content plus every parameter that
+changes the decode (model, compute type, language, task, VAD and beam
+settings), so renaming or moving a file still hits, while editing the audio
+or changing a setting misses. Each entry is one JSON file; the least
+recently used entries are deleted once the directory exceeds its size budget.
+"""
+import hashlib
+import json
+import os
+import threading
+
+DEFAULT_CACHE_DIR = os.path.join("data", "transcription_cache")
+DEFAULT_MAX_MB = int(os.environ.get("WHISPER_CACHE_MB", "256"))
+
+# Bump when the stored entry layout or the decode defaults change
+CACHE_VERSION = 1
+
+_CHUNK_SIZE = 1 << 20
+
+
+def hash_audio(source):
+    """Return the sha256 hex digest of an audio file or sample array.
+
+    Args:
+        source: Path to audio file, numpy array or bytes-like buffer
+
+    Returns:
+        Hex digest string
+    """
+    digest = hashlib.sha256()
+    if isinstance(source, str):
+        digest.update(b"file:")
+        with open(source, "rb") as f:
+            for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+                digest.update(chunk)
+    else:
+        if not isinstance(source, (bytes, bytearray, memoryview)):
+            import numpy as np
+            source = np.ascontiguousarray(source, dtype=np.float32).reshape(-1)
+        digest.update(b"pcm:")
+        digest.update(memoryview(source).cast("B"))
+    return digest.hexdigest()
+
+
+class TranscriptionCache:
+    """On-disk LRU cache of transcription segments."""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_mb=DEFAULT_MAX_MB):
+        """Initialize the cache.
+
+        Args:
+            directory: Directory holding one JSON file per entry
+            max_mb: Size budget for the directory in megabytes
+        """
+        self.directory = directory
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._sizes = None
+        # (path, size, mtime) -> digest, so re-running a file does not re-hash it
+        self._file_hashes = {}
+
+    def audio_key(self, source):
+        """Hash audio content, reusing the digest of an unchanged file."""
+        if not isinstance(source, str):
+            return hash_audio(source)
+
+        stat = os.stat(source)
+        file_id = (os.path.abspath(source), stat.st_size, stat.st_mtime_ns)
+        digest = self._file_hashes.get(file_id)
+        if digest is None:
+            digest = hash_audio(source)
+            self._file_hashes[file_id] = digest
+        return digest
+
+    def make_key(self, source, **params):
+        """Build the cache key for audio and decode parameters.
+
+        Args:
+            source: Path to audio file, numpy array or buffer
+            **params: Everything that affects the output (model name,
+                compute type, language, task, vad_filter, vad_parameters,
+                beam_size, ...)
+
+        Returns:
+            Hex digest string
+        """
+        payload = json.dumps(
+            {"version": CACHE_VERSION, "audio": self.audio_key(source), "params": params},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _load_sizes(self):
+        """Index existing entries by size on first use."""
+        if self._sizes is not None:
+            return
+        self._sizes = {}
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                try:
+                    self._sizes[name[:-5]] = os.path.getsize(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    def get(self, key):
+        """Return the stored entry dict for key, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        try:
+            # Access time for LRU ordering; atime is often disabled
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def put(self, key, segments, **info):
+        """Store segments (list of dicts) and extra info for key."""
+        entry = dict(info, segments=segments)
+        data = json.dumps(entry, ensure_ascii=False).encode("utf-8")
+
+        with self._lock:
+            self._load_sizes()
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._path(key)
+            tmp_path = f"{path}.tmp"
+            try:
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"Error writing transcription cache entry: {e}")
+                return
+            self._sizes[key] = len(data)
+            self._evict(keep=key)
+
+    def _evict(self, keep=None):
+        """Delete least recently used entries until under the size budget."""
+        total = sum(self._sizes.values())
+        if total <= self.max_bytes:
+            return
+
+        def last_used(key):
+            try:
+                return os.path.getmtime(self._path(key))
+            except OSError:
+                return 0.0
+
+        for key in sorted(self._sizes, key=last_used):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            total -= self._sizes.pop(key)
+            self.evictions += 1
+
+    def clear(self):
+        """Delete all entries."""
+        with self._lock:
+            self._load_sizes()
+            for key in list(self._sizes):
+                try:
+                    os.remove(self._path(key))
+                except OSError:
+                    pass
+            self._sizes = {}
+
+    def stats(self):
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            self._load_sizes()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._sizes),
+                "size_mb": sum(self._sizes.values()) / (1024 * 1024),
+                "max_mb": self.max_bytes / (1024 * 1024),
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_transcription_cache():
+    """Return the process-wide transcription cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = TranscriptionCache()
+        return _cache
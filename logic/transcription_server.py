@@ -0,0 +1,374 @@
+"""Multi-session live transcription server over plain TCP.
+
+Several clients (e.g. handheld devices) stream PCM audio to one box. Each
+connection gets its own LiveTranscription segmenter (VAD, ring buffer and
+utterance queue); all sessions share one model from the model pool and
+are decoded in round-robin order, one batch per session per turn, so a
+talkative client cannot starve the others.
+
+Protocol (client to server):
+    1. One JSON line with session options, e.g.
+       {"language": "en", "task": "transcribe", "vad": "fft", "format": "s16"}
+    2. Audio frames: a 4-byte big-endian length followed by that many bytes
+       of mono 16 kHz PCM ("s16" little-endian int16 or "f32" float32).
+       A zero-length frame ends the stream.
+
+Server to client, one JSON object per line:
+    {"type": "ready", "session": 1}
+    {"type": "transcript", "session": 1, "index": 0, "text": ..., "entities": {...}, "intent": ...}
+    {"type": "error", "session": 1, "message": ...}
+    {"type": "done", "session": 1, "stats": {...}}
+
+Usage:
+    python -m logic.transcription_server --port 8765 --model int8_tiny_en
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import struct
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from logic.live_transcription import BlockSize, LiveTranscription, get_optimal_thread_count
+from logic.model_pool import get_model_pool
+from logic.utterance_queue import BLOCK, DROP_OLDEST
+
+SAMPLE_RATE = 16000
+SAMPLE_FORMATS = {"s16": np.dtype("<i2"), "f32": np.dtype("<f4")}
+MAX_FRAME_BYTES = 1 << 20
+
+_LENGTH = struct.Struct(">I")
+
+
+class _Session:
+    """One client connection: its segmenter, output stream and progress."""
+
+    def __init__(self, session_id, live, writer, sample_format):
+        self.id = session_id
+        self.live = live
+        self.writer = writer
+        self.dtype = SAMPLE_FORMATS[sample_format]
+        self.block_frames = int(SAMPLE_RATE * BlockSize / 1000)
+        self._pending = np.zeros(0, dtype=np.float32)
+        self.busy = False
+        self.transcripts = 0
+        self.decoded = asyncio.Event()
+
+    def has_work(self):
+        return len(self.live.utterances) > 0
+
+    def feed(self, payload):
+        """Convert a PCM frame to float32 and pass it on in live-sized blocks."""
+        samples = np.frombuffer(payload[:len(payload) // self.dtype.itemsize * self.dtype.itemsize], dtype=self.dtype)
+        if self.dtype.kind == "i":
+            samples = samples.astype(np.float32) / 32768.0
+        samples = np.concatenate([self._pending, samples.astype(np.float32, copy=False)])
+
+        usable = len(samples) // self.block_frames * self.block_frames
+        for offset in range(0, usable, self.block_frames):
+            block = samples[offset:offset + self.block_frames]
+            self.live.callback(block.reshape(-1, 1), self.block_frames, None, None)
+        self._pending = samples[usable:]
+
+    async def send(self, message):
+        message["session"] = self.id
+        try:
+            self.writer.write((json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8"))
+            await self.writer.drain()
+        except (ConnectionError, RuntimeError):
+            # Client went away; its stream is cleaned up by the reader
+            pass
+
+
+class TranscriptionServer:
+    """Accepts concurrent PCM streams and transcribes them on a shared model."""
+
+    def __init__(
+        self,
+        model_path="int8_tiny_en",
+        device="cpu",
+        compute_type="int8",
+        threads=None,
+        decode_workers=1,
+        max_batch_size=4,
+        queue_size=4,
+        host="127.0.0.1",
+        port=8765,
+        extractor=None,
+        on_status_update=print,
+    ):
+        """Initialize the server.
+
+        Args:
+            model_path: Whisper model name or path shared by all sessions
+            device: Device to run model on ('cpu' or 'cuda')
+            compute_type: Compute type of the shared model
+            threads: CPU threads for the model (default: 70% of cores)
+            decode_workers: Decodes running in parallel (CTranslate2 workers)
+            max_batch_size: Most utterances of one session decoded per turn
+            queue_size: Utterances a session may have waiting before the
+                oldest is dropped
+            host: Address to listen on
+            port: TCP port to listen on
+            extractor: EntityExtractor for per-transcript entities and intent
+                (default: a new one)
+            on_status_update: Callback for server status messages
+        """
+        self.model_path = model_path
+        self.device = device
+        self.compute_type = compute_type
+        self.threads = threads if threads is not None else get_optimal_thread_count()
+        self.decode_workers = max(1, decode_workers)
+        self.max_batch_size = max_batch_size
+        self.queue_size = queue_size
+        self.host = host
+        self.port = port
+        self.on_status_update = on_status_update
+        if extractor is None:
+            from logic.entity_extractor import EntityExtractor
+            extractor = EntityExtractor()
+        self.extractor = extractor
+
+        self.model = None
+        self._sessions = deque()
+        self._ids = itertools.count(1)
+        self._work = None
+        self._executor = None
+        self._schedulers = []
+        self._server = None
+
+    async def start(self):
+        """Load the shared model and start listening."""
+        loop = asyncio.get_running_loop()
+        self._work = asyncio.Event()
+        self._executor = ThreadPoolExecutor(max_workers=self.decode_workers, thread_name_prefix="decode")
+        self.model = await loop.run_in_executor(self._executor, lambda: get_model_pool().get(
+            self.model_path,
+            device=self.device,
+            compute_type=self.compute_type,
+            cpu_threads=self.threads,
+            num_workers=self.decode_workers,
+        ))
+        self._schedulers = [asyncio.create_task(self._scheduler()) for _ in range(self.decode_workers)]
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self.on_status_update(f"Transcription server listening on {self.host}:{self.port}")
+        return self._server
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        """Stop accepting clients and stop the schedulers."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for task in self._schedulers:
+            task.cancel()
+        await asyncio.gather(*self._schedulers, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def _create_session(self, writer, options):
+        overflow_policy = options.get("overflow_policy", DROP_OLDEST)
+        if overflow_policy == BLOCK:
+            # Blocking would stall the event loop and every other client
+            raise ValueError("The block overflow policy is not available on the server")
+
+        live = LiveTranscription(
+            on_transcription=lambda text: None,
+            on_status_update=lambda status: None,
+            on_error=lambda error: None,
+            model_path=self.model_path,
+            device=self.device,
+            compute_type=self.compute_type,
+            language=options.get("language"),
+            task=options.get("task", "transcribe"),
+            threads=self.threads,
+            input_device_sample_rate=SAMPLE_RATE,
+            vad_filter=options.get("vad_filter", True),
+            queue_size=self.queue_size,
+            overflow_policy=overflow_policy,
+            vad_backend=options.get("vad", "fft"),
+            max_batch_size=self.max_batch_size,
+            max_wait_ms=0,
+        )
+        live.transcribe_model = self.model
+        live.prepare()
+
+        sample_format = options.get("format", "s16")
+        if sample_format not in SAMPLE_FORMATS:
+            raise ValueError(f"Unsupported sample format '{sample_format}', expected one of {list(SAMPLE_FORMATS)}")
+        return _Session(next(self._ids), live, writer, sample_format)
+
+    async def _handle_client(self, reader, writer):
+        session = None
+        try:
+            options = json.loads((await reader.readline()).decode("utf-8") or "{}")
+            session = self._create_session(writer, options)
+        except Exception as e:
+            writer.write((json.dumps({"type": "error", "message": f"Invalid session options: {e}"}) + "\n").encode("utf-8"))
+            await writer.drain()
+            writer.close()
+            return
+
+        self._sessions.append(session)
+        await session.send({"type": "ready"})
+        try:
+            while True:
+                (length,) = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))
+                if length == 0:
+                    break
+                if length > MAX_FRAME_BYTES:
+                    raise ValueError(f"Frame of {length} bytes exceeds {MAX_FRAME_BYTES}")
+                session.feed(await reader.readexactly(length))
+                if session.has_work():
+                    self._work.set()
+
+            # End of stream: decode what is left, then report
+            session.live.flush()
+            self._work.set()
+            while session.has_work() or session.busy:
+                session.decoded.clear()
+                await session.decoded.wait()
+            await session.send({"type": "done", "stats": dict(session.live.get_stats(), transcripts=session.transcripts)})
+        except asyncio.IncompleteReadError:
+            pass
+        except Exception as e:
+            await session.send({"type": "error", "message": str(e)})
+        finally:
+            self._sessions.remove(session)
+            session.live.running = False
+            session.live.utterances.close()
+            writer.close()
+
+    def _next_session(self):
+        """Return the next idle session with queued utterances, round-robin."""
+        for _ in range(len(self._sessions)):
+            session = self._sessions[0]
+            self._sessions.rotate(-1)
+            if not session.busy and session.has_work():
+                return session
+        return None
+
+    async def _scheduler(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            session = self._next_session()
+            if session is None:
+                self._work.clear()
+                await self._work.wait()
+                continue
+
+            session.busy = True
+            try:
+                try:
+                    texts = await loop.run_in_executor(self._executor, session.live.decode_next, 0)
+                except Exception as e:
+                    texts = []
+                    await session.send({"type": "error", "message": f"Transcription error: {e}"})
+
+                # Still busy while sending: the client handler must not report
+                # "done" before these transcripts are out
+                for text in texts or []:
+                    if not text.strip():
+                        continue
+                    result = self.extractor.extract(text)
+                    await session.send({
+                        "type": "transcript",
+                        "index": session.transcripts,
+                        "text": text.strip(),
+                        "entities": result["entities"],
+                        "intent": result["intent"],
+                    })
+                    session.transcripts += 1
+            finally:
+                session.busy = False
+                session.decoded.set()
+                # Another scheduler may be waiting for this session to be idle
+                self._work.set()
+
+
+async def stream_audio(host, port, samples, options=None, chunk_seconds=0.1, realtime=False):
+    """Reference client: stream float32 16 kHz samples and collect the replies.
+
+    Args:
+        host: Server address
+        port: Server port
+        samples: Mono float32 samples at 16 kHz
+        options: Session options sent in the first line
+        chunk_seconds: Audio per frame
+        realtime: Pace frames like a live microphone
+
+    Returns:
+        List of messages received from the server
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    options = dict(options or {}, format="f32")
+    writer.write((json.dumps(options) + "\n").encode("utf-8"))
+
+    messages = []
+
+    async def receive():
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            message = json.loads(line)
+            messages.append(message)
+            if message["type"] == "done":
+                return
+
+    receiver = asyncio.create_task(receive())
+    chunk = int(SAMPLE_RATE * chunk_seconds)
+    samples = np.asarray(samples, dtype="<f4")
+    for offset in range(0, len(samples), chunk):
+        payload = samples[offset:offset + chunk].tobytes()
+        writer.write(_LENGTH.pack(len(payload)) + payload)
+        await writer.drain()
+        if realtime:
+            await asyncio.sleep(chunk_seconds)
+    writer.write(_LENGTH.pack(0))
+    await writer.drain()
+
+    await receiver
+    writer.close()
+    return messages
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve live transcription to several clients over TCP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--model", default="int8_tiny_en", help="Model name or path shared by all sessions")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--compute-type", default="int8")
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=1, help="Decodes running in parallel")
+    parser.add_argument("--batch-size", type=int, default=4, help="Most utterances of one session per turn")
+    args = parser.parse_args(argv)
+
+    server = TranscriptionServer(
+        model_path=args.model,
+        device=args.device,
+        compute_type=args.compute_type,
+        threads=args.threads,
+        decode_workers=args.workers,
+        max_batch_size=args.batch_size,
+        host=args.host,
+        port=args.port,
+    )
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
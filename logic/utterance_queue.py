@@ -0,0 +1,133 @@
+"""Bounded hand-off queue between the audio callback and the decoder thread."""
+import threading
+import time
+from collections import deque
+
+DROP_OLDEST = "drop_oldest"
+MERGE = "merge"
+BLOCK = "block"
+OVERFLOW_POLICIES = (DROP_OLDEST, MERGE, BLOCK)
+
+
+class UtteranceQueue:
+    """Bounded FIFO of utterances with a configurable overflow policy.
+
+    Policies when the queue is full:
+        drop_oldest: discard the oldest pending utterance
+        merge: merge the new utterance into the newest pending one using the
+            `merge` callable; falls back to drop_oldest if it returns None
+        block: wait until the consumer frees a slot (or the queue is closed)
+
+    Counters for depth, drops and merges are available through `stats()`.
+    """
+
+    def __init__(self, maxsize: int = 4, policy: str = DROP_OLDEST, merge=None, size_of=len):
+        """Initialize the queue.
+
+        Args:
+            maxsize: Maximum number of pending utterances
+            policy: One of OVERFLOW_POLICIES
+            merge: Callable(older, newer) returning the merged item or None
+            size_of: Callable returning the number of samples in an item
+        """
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{policy}', expected one of {OVERFLOW_POLICIES}")
+        if policy == MERGE and merge is None:
+            raise ValueError("The merge policy requires a merge function")
+
+        self.maxsize = max(1, int(maxsize))
+        self.policy = policy
+        self._merge = merge
+        self._size_of = size_of
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+        self.max_depth = 0
+        self.dropped_utterances = 0
+        self.dropped_samples = 0
+        self.merged_utterances = 0
+        self.blocked_seconds = 0.0
+
+    def __len__(self):
+        return len(self._items)
+
+    def put(self, item):
+        """Add an utterance, applying the overflow policy if the queue is full.
+
+        Returns:
+            False if the queue was closed and the item was discarded
+        """
+        with self._cond:
+            if self._closed:
+                return False
+
+            if len(self._items) >= self.maxsize:
+                if self.policy == BLOCK:
+                    started = time.monotonic()
+                    while len(self._items) >= self.maxsize and not self._closed:
+                        self._cond.wait()
+                    self.blocked_seconds += time.monotonic() - started
+                    if self._closed:
+                        return False
+                elif self.policy == MERGE and self._merge_into_newest(item):
+                    self._cond.notify()
+                    return True
+                else:
+                    self.drop(self._items.popleft())
+
+            self._items.append(item)
+            self.max_depth = max(self.max_depth, len(self._items))
+            self._cond.notify()
+            return True
+
+    def _merge_into_newest(self, item):
+        """Try to merge item into the newest pending utterance (lock held)."""
+        merged = self._merge(self._items[-1], item)
+        if merged is None:
+            return False
+        self._items[-1] = merged
+        self.merged_utterances += 1
+        return True
+
+    def get(self, timeout=None):
+        """Remove and return the oldest utterance.
+
+        Blocks until an item is available, the timeout expires or the queue
+        is closed.
+
+        Returns:
+            The utterance, or None on timeout or when closed and empty
+        """
+        with self._cond:
+            if not self._items and not self._closed:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            item = self._items.popleft()
+            self._cond.notify()
+            return item
+
+    def drop(self, item):
+        """Count an utterance as dropped (for items discarded by the consumer too)."""
+        with self._cond:
+            self.dropped_utterances += 1
+            self.dropped_samples += self._size_of(item)
+
+    def close(self):
+        """Wake up all waiters and reject further items."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stats(self):
+        """Return queue counters as a dict."""
+        with self._cond:
+            return {
+                "depth": len(self._items),
+                "max_depth": self.max_depth,
+                "dropped_utterances": self.dropped_utterances,
+                "dropped_samples": self.dropped_samples,
+                "merged_utterances": self.merged_utterances,
+                "blocked_seconds": round(self.blocked_seconds, 3),
+            }
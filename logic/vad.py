@@ -0,0 +1,154 @@
+"""Voice activity detection backends for live segmentation."""
+import os
+import numpy as np
+
+Vocals = [50, 1000]
+
+
+class VoiceDetector:
+    """Base class for per-block voice activity detectors."""
+
+    name = "base"
+
+    def is_speech(self, block) -> bool:
+        """Return True if the 1-D float32 audio block contains speech."""
+        raise NotImplementedError
+
+    def reset(self):
+        """Clear any state carried between blocks."""
+
+
+class FFTVoiceDetector(VoiceDetector):
+    """Heuristic detector: dominant frequency in the vocal band plus RMS volume."""
+
+    name = "fft"
+
+    def __init__(self, threshold: float = 0.1, sample_rate: int = 16000, vocals=Vocals):
+        """Initialize the detector.
+
+        Args:
+            threshold: Minimum RMS volume counted as speech
+            sample_rate: Sample rate of the incoming blocks
+            vocals: [low, high] frequency band in Hz treated as voice
+        """
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+        self.vocals = vocals
+
+    def is_speech(self, block):
+        freq = (
+            np.argmax(np.abs(np.fft.rfft(block)))
+            * self.sample_rate
+            / len(block)
+        )
+        volume = np.sqrt(np.mean(block**2))
+
+        return volume > self.threshold and self.vocals[0] <= freq <= self.vocals[1]
+
+
+class SileroVoiceDetector(VoiceDetector):
+    """Silero VAD v5 running on onnxruntime in streaming mode.
+
+    Uses the encoder/decoder ONNX files bundled with faster-whisper. Silero
+    scores fixed 512-sample windows (32 ms at 16 kHz), so incoming blocks of
+    any size (30 ms by default) are accumulated and a block counts as speech
+    if any window completed during it scored above the threshold. The
+    recurrent state and 64-sample context are carried across windows.
+    """
+
+    name = "silero"
+    window_samples = 512
+    context_samples = 64
+
+    def __init__(self, threshold: float = 0.5, sample_rate: int = 16000, encoder_path=None, decoder_path=None):
+        """Load the ONNX sessions.
+
+        Args:
+            threshold: Speech probability above which a window counts as speech
+            sample_rate: Sample rate of the incoming blocks (must be 16000)
+            encoder_path: Path to the Silero encoder model (default: bundled)
+            decoder_path: Path to the Silero decoder model (default: bundled)
+        """
+        if sample_rate != 16000:
+            raise ValueError("Silero VAD requires 16 kHz audio")
+
+        import onnxruntime
+
+        if encoder_path is None or decoder_path is None:
+            from faster_whisper.utils import get_assets_path
+            encoder_path = encoder_path or os.path.join(get_assets_path(), "silero_encoder_v5.onnx")
+            decoder_path = decoder_path or os.path.join(get_assets_path(), "silero_decoder_v5.onnx")
+
+        opts = onnxruntime.SessionOptions()
+        opts.inter_op_num_threads = 1
+        opts.intra_op_num_threads = 1
+        opts.log_severity_level = 4
+
+        self.encoder = onnxruntime.InferenceSession(encoder_path, providers=["CPUExecutionProvider"], sess_options=opts)
+        self.decoder = onnxruntime.InferenceSession(decoder_path, providers=["CPUExecutionProvider"], sess_options=opts)
+        self.threshold = threshold
+
+        self._frame = np.zeros((1, self.context_samples + self.window_samples), dtype=np.float32)
+        self._pending = np.zeros(self.window_samples, dtype=np.float32)
+        self._state = np.zeros((2, 1, 128), dtype=np.float32)
+        self.reset()
+
+    def reset(self):
+        self._frame[:] = 0
+        self._state[:] = 0
+        self._pending_count = 0
+        self.last_probability = 0.0
+
+    def _score_window(self):
+        """Score the window currently held in the frame buffer."""
+        encoded = self.encoder.run(None, {"input": self._frame})[0]
+        out, self._state = self.decoder.run(None, {"input": encoded.reshape(1, 128), "state": self._state})
+        # The last context_samples of this window are the next window's context
+        self._frame[0, :self.context_samples] = self._frame[0, -self.context_samples:]
+        return float(out.reshape(-1)[0])
+
+    def is_speech(self, block):
+        scores = []
+        offset = 0
+        while offset < len(block):
+            take = min(self.window_samples - self._pending_count, len(block) - offset)
+            self._pending[self._pending_count:self._pending_count + take] = block[offset:offset + take]
+            self._pending_count += take
+            offset += take
+
+            if self._pending_count == self.window_samples:
+                self._frame[0, self.context_samples:] = self._pending
+                self._pending_count = 0
+                scores.append(self._score_window())
+
+        if scores:
+            self.last_probability = max(scores)
+        return self.last_probability > self.threshold
+
+
+VAD_BACKENDS = {
+    FFTVoiceDetector.name: FFTVoiceDetector,
+    SileroVoiceDetector.name: SileroVoiceDetector,
+}
+
+
+def create_voice_detector(backend="fft", threshold=None, sample_rate=16000):
+    """Create a voice detector by backend name.
+
+    Args:
+        backend: Backend name from VAD_BACKENDS, or a VoiceDetector instance
+        threshold: Backend-specific threshold (None for the backend default)
+        sample_rate: Sample rate of the incoming blocks
+
+    Returns:
+        VoiceDetector instance
+    """
+    if isinstance(backend, VoiceDetector):
+        return backend
+    if backend not in VAD_BACKENDS:
+        raise ValueError(f"Unknown VAD backend '{backend}', expected one of {list(VAD_BACKENDS)}")
+
+    kwargs = {"sample_rate": sample_rate}
+    if threshold is not None:
+        kwargs["threshold"] = threshold
+    return VAD_BACKENDS[backend](**kwargs)
@@ -1,29 +1,197 @@
 """Service for handling Whisper model transcription in a background thread."""
 import threading
-from faster_whisper import WhisperModel
+import time
+from logic.model_pool import get_model_pool
+from logic.tracing import get_tracer
+from logic.transcription_cache import get_transcription_cache
+
+BEAM_SIZE = 5
+
+def as_audio_input(source):
+    """Normalize a transcription source for faster-whisper.
+
+    Args:
+        source: Path to audio file, numpy array of samples, or a buffer
+            (bytes, bytearray, memoryview) of float32 samples at 16 kHz
+
+    Returns:
+        The path unchanged, or a 1-D float32 numpy array (no copy when the
+        input already is one)
+    """
+    if isinstance(source, str):
+        return source
+
+    import numpy as np
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return np.frombuffer(source, dtype=np.float32)
+    if isinstance(source, np.ndarray):
+        return source.reshape(-1).astype(np.float32, copy=False)
+    return source
 
 class WhisperService:
     """Service for processing audio files with Faster Whisper model."""
-    
-    def __init__(self, on_status_update, on_result, on_error, on_complete):
+
+    def __init__(self, on_status_update, on_result, on_error, on_complete, on_segment=None, cache=None):
         """Initialize service with callback functions.
-        
+
         Args:
             on_status_update: Callback for status updates
             on_result: Callback for successful transcription
             on_error: Callback for error handling
             on_complete: Callback when process completes
+            on_segment: Callback for each decoded segment dict with
+                start, end and text (optional)
+            cache: TranscriptionCache to reuse results of identical runs
+                (default: the shared on-disk cache; False disables it)
         """
         self.on_status_update = on_status_update
         self.on_result = on_result
         self.on_error = on_error
         self.on_complete = on_complete
-    
+        self.on_segment = on_segment
+        self.cache = get_transcription_cache() if cache is None else cache or None
+
+    def _compute_type(self, device):
+        return "float16" if device == "cuda" else "float32"
+
+    def _get_model(self, model_name, device):
+        """Fetch the model for a device from the shared model pool."""
+        compute_type = self._compute_type(device)
+        device_type = device if device == "cuda" else "cpu"
+
+        return get_model_pool().get(
+            model_name,
+            device=device_type,
+            compute_type=compute_type,
+            on_load=lambda name: self.on_status_update(f"Loading model '{name}'...")
+        )
+
+    def iter_segments(self, file_path, model_name, device, use_vad=True, vad_parameters=None, language=None, task="transcribe"):
+        """Transcribe audio file and yield segments as soon as they are decoded.
+
+        Runs in the calling thread, for headless use.
+
+        Args:
+            file_path: Path to audio file, or float32 mono samples at 16 kHz
+                (numpy array or buffer) to skip decoding a file
+            model_name: Whisper model name to use
+            device: Device to run model on (cpu/cuda)
+            use_vad: Whether to use VAD filter to remove silence
+            vad_parameters: Custom VAD parameters dict (optional)
+            language: Language code to use for transcription (optional)
+            task: Task to perform (transcribe or translate)
+
+        Yields:
+            Dict with segment start and end in seconds and its text
+        """
+        tracer = get_tracer()
+        lang = None if language == "auto" else language
+        audio = as_audio_input(file_path)
+
+        cache_key = None
+        if self.cache:
+            with tracer.span("cache.lookup"):
+                cache_key = self.cache.make_key(
+                    audio,
+                    model=model_name,
+                    compute_type=self._compute_type(device),
+                    language=lang,
+                    task=task,
+                    vad_filter=use_vad,
+                    vad_parameters=vad_parameters,
+                    beam_size=BEAM_SIZE,
+                )
+                cached = self.cache.get(cache_key)
+            if cached is not None:
+                self.on_status_update("Using cached transcription...")
+                yield from cached["segments"]
+                return
+
+        with tracer.span("model.load", model=model_name):
+            model = self._get_model(model_name, device)
+
+        vad_status = " with VAD filter" if use_vad else ""
+        if task == "translate":
+            self.on_status_update(f"Translating audio to English{vad_status}...")
+        else:
+            self.on_status_update(f"Transcribing audio{vad_status}...")
+
+        started = time.perf_counter()
+        # Audio decoding, VAD, feature extraction and language detection
+        # happen eagerly here; encoding and decoding happen while iterating.
+        with tracer.span("transcribe.prepare"):
+            segments, info = model.transcribe(
+                audio,
+                vad_filter=use_vad,
+                vad_parameters=vad_parameters,
+                language=lang,
+                task=task,
+                beam_size=BEAM_SIZE
+            )
+
+        # faster-whisper decodes lazily, so each segment is available here
+        # right after its window has been decoded.
+        decoded = []
+        segment_started = time.perf_counter()
+        for segment in segments:
+            tracer.record("transcribe.segment", time.perf_counter() - segment_started,
+                          audio_seconds=segment.end - segment.start)
+            item = {"start": segment.start, "end": segment.end, "text": segment.text}
+            decoded.append(item)
+            yield item
+            segment_started = time.perf_counter()
+
+        tracer.record("transcribe.total", time.perf_counter() - started, audio_seconds=info.duration, model=model_name)
+
+        # Only complete runs are stored
+        if cache_key:
+            self.cache.put(cache_key, decoded, language=info.language, duration=info.duration)
+
+    def start_recording_session(self, model_name, device, use_vad=True, vad_parameters=None, language=None, task="transcribe", sample_rate=16000):
+        """Start transcribing a recording while it is still being recorded.
+
+        Feed recorder blocks to the returned session's feed() and call its
+        finish() on stop; the usual callbacks report segments, the final
+        transcript and completion.
+
+        Args:
+            model_name: Whisper model name to use
+            device: Device to run model on (cpu/cuda)
+            use_vad: Whether to use VAD filter to remove silence
+            vad_parameters: Custom VAD parameters dict (optional)
+            language: Language code to use for transcription (optional)
+            task: Task to perform (transcribe or translate)
+            sample_rate: Sample rate of the recorded audio
+
+        Returns:
+            Started RecordingTranscriber
+        """
+        from logic.pipelined_transcription import RecordingTranscriber
+
+        session = RecordingTranscriber(
+            get_model=lambda: self._get_model(model_name, device),
+            on_segment=self.on_segment,
+            on_result=self.on_result,
+            on_status_update=self.on_status_update,
+            on_error=self.on_error,
+            on_complete=self.on_complete,
+            sample_rate=sample_rate,
+            transcribe_options={
+                "vad_filter": use_vad,
+                "vad_parameters": vad_parameters,
+                "language": None if language == "auto" else language,
+                "task": task,
+            },
+        )
+        session.start()
+        return session
+
     def transcribe(self, file_path, model_name, device, use_vad=True, vad_parameters=None, language=None, task="transcribe"):
         """Transcribe audio file using specified Whisper model.
-        
+
         Args:
-            file_path: Path to audio file
+            file_path: Path to audio file, or float32 mono samples at 16 kHz
+                (numpy array or buffer) to skip decoding a file
             model_name: Whisper model name to use
             device: Device to run model on (cpu/cuda)
             use_vad: Whether to use VAD filter to remove silence
@@ -33,31 +201,14 @@ class WhisperService:
         """
         def _transcribe_thread():
             try:
-                self.on_status_update(f"Loading model '{model_name}'...")
-                
-                compute_type = "float16" if device == "cuda" else "float32"
-                device_type = device if device == "cuda" else "cpu"
-                
-                model = WhisperModel(model_name, device=device_type, compute_type=compute_type)
-                
-                vad_status = " with VAD filter" if use_vad else ""
-                if task == "translate":
-                    self.on_status_update(f"Translating audio to English{vad_status}...")
-                else:
-                    self.on_status_update(f"Transcribing audio{vad_status}...")
-                
-                lang = None if language == "auto" else language
-                
-                segments, _ = model.transcribe(
-                    file_path,
-                    vad_filter=use_vad,
-                    vad_parameters=vad_parameters,
-                    language=lang,
-                    task=task
-                )
-                
-                transcript = " ".join([segment.text for segment in segments])
-                
+                texts = []
+                for segment in self.iter_segments(file_path, model_name, device, use_vad, vad_parameters, language, task):
+                    texts.append(segment["text"])
+                    if self.on_segment:
+                        self.on_segment(segment)
+
+                transcript = " ".join(texts)
+
                 self.on_result(transcript)
                 if task == "translate":
                     self.on_status_update("Translation complete!")
@@ -71,4 +222,4 @@ class WhisperService:
         threading.Thread(
             target=_transcribe_thread,
             daemon=True
-        ).start() 
\ No newline at end of file
+        ).start()
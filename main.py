@@ -1,7 +1,18 @@
 """Whisper Transcription App entry point."""
-import flet as ft
-from logic.app import WhisperApp
 import os
+import sys
+from logic import startup_profiler, tracing
+
+if "--profile-startup" in sys.argv:
+    startup_profiler.enable()
+if "--trace" in sys.argv:
+    tracing.enable()
+profiler = startup_profiler.get_profiler()
+
+with profiler.span("import flet"):
+    import flet as ft
+with profiler.span("import logic.app"):
+    from logic.app import WhisperApp
 
 # Set the JAVA_HOME environment variable for the application process
 java_home = r'C:\Program Files\Eclipse Adoptium\jdk-21.0.8.9-hotspot'
@@ -0,0 +1,102 @@
+"""Append-only transcript display."""
+import flet as ft
+
+
+class TranscriptView:
+    """Transcript shown as committed segment controls plus one interim line.
+
+    Committed segments are never rewritten: appending one adds a single
+    Text control, so Flet's diff sends only that control (and the interim
+    line) to the client no matter how long the session gets. The interim
+    line holds the live hypothesis that may still change.
+    """
+
+    def __init__(self, request_update=None, text_size=16):
+        """Initialize the view.
+
+        Args:
+            request_update: Callable marking controls for the next page
+                update (e.g. UpdateScheduler.request); updates directly if None
+            text_size: Font size of the transcript
+        """
+        self.request_update = request_update
+        self.text_size = text_size
+        self.segments = []
+        self.interim = ft.Text("", size=text_size, italic=True, color=ft.Colors.GREY_500, selectable=True)
+        self.list_view = ft.ListView(controls=[self.interim], spacing=4, auto_scroll=True, expand=True)
+        self.control = ft.Container(
+            content=self.list_view,
+            border=ft.border.all(1, ft.Colors.GREY_700),
+            border_radius=4,
+            padding=10,
+            height=320,
+            expand=True,
+        )
+
+    def _update(self, *controls):
+        if self.request_update:
+            self.request_update(*controls)
+        else:
+            for control in controls:
+                if control.page is not None:
+                    control.update()
+
+    def append(self, text):
+        """Commit a segment and clear the interim line."""
+        text = text.strip()
+        if not text:
+            return
+        self.segments.append(text)
+        self.list_view.controls.insert(
+            len(self.list_view.controls) - 1,
+            ft.Text(text, size=self.text_size, selectable=True),
+        )
+        self.interim.value = ""
+        self._update(self.list_view)
+
+    def set_interim(self, text):
+        """Show the current, still changing hypothesis after the committed text."""
+        text = text.strip()
+        if text == self.interim.value:
+            return
+        self.interim.value = text
+        self._update(self.interim)
+
+    def clear(self):
+        """Remove all segments and the interim text."""
+        self.segments = []
+        self.interim.value = ""
+        self.list_view.controls = [self.interim]
+        self._update(self.list_view)
+
+    @property
+    def value(self):
+        """Full transcript: committed segments followed by the interim text."""
+        return " ".join(self.segments + ([self.interim.value] if self.interim.value else []))
+
+    @value.setter
+    def value(self, text):
+        # Replacing the whole transcript (final results, errors, history)
+        # is the one operation that resends everything.
+        self.segments = []
+        self.interim.value = ""
+        self.list_view.controls = [self.interim]
+        if text:
+            self.append(text)
+        else:
+            self._update(self.list_view)
+
+    @property
+    def committed_text(self):
+        return " ".join(self.segments)
+
+    def tail(self, chars):
+        """Return the last committed segments, joined, covering more than chars characters if available."""
+        parts = []
+        length = -1
+        for segment in reversed(self.segments):
+            parts.append(segment)
+            length += len(segment) + 1
+            if length > chars:
+                break
+        return " ".join(reversed(parts))
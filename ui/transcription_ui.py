@@ -4,27 +4,57 @@ import os
 from ui.theme_lang import AppThemeLang
 from ui.components import create_info_card, create_section_title, create_section_container
 from flet import Text, Column, Row
-from logic.entity_extractor import EntityExtractor
+from ui.transcript_view import TranscriptView
 
-entity_extractor = EntityExtractor()
+# Characters of the transcript tail shown above the entities
+DISPLAY_TAIL_CHARS = 200
 
-def create_transcription_display(transcription_text):
-    def update_display(transcription):
-        processed_text = entity_extractor.preprocess(transcription)
-        entities = entity_extractor.extract_entities(processed_text)
-        intent = entity_extractor.classify_intent(processed_text)
-        transcription_text.value = f"Transcript: {transcription}"
-        # Find the second Text widget (entities_text) by index
-        if len(transcription_display.controls) > 1:
-            transcription_display.controls[1].value = f"Entities: {entities}, Intent: {intent}"
-        entity_extractor.log_entities_intents(entities, intent, transcription)
-        transcription_text.page.update()
+def create_transcription_display(entity_extractor, request_update=None):
+    """Create the transcript and entity display.
+    
+    Only the tail of the transcript is shown here (the full text is in the
+    result section), and a line is sent to the client only if it changed,
+    so updates stay the same size however long the transcript grows.
+    
+    Args:
+        entity_extractor: Shared EntityExtractor instance
+        request_update: Callable marking controls for the next batched page
+            update (e.g. UpdateScheduler.request); updates directly if None
+        
+    Returns:
+        Tuple of (display column, update function)
+    """
+    transcript_line = Text(value="Waiting for transcription...", size=20, color="white")
+    entities_line = Text(value="Entities: {}, Intent: unknown", size=18, color="white")
+    
+    def update_display(transcription, result=None):
+        # Live sessions pass the running IncrementalExtractor result, which
+        # has already been computed and logged for the new segment
+        if result is None:
+            processed_text = entity_extractor.preprocess(transcription)
+            entities = entity_extractor.extract_entities(processed_text)
+            intent = entity_extractor.classify_intent(processed_text)
+            entity_extractor.log_entities_intents(entities, intent, transcription)
+        else:
+            entities, intent = result["entities"], result["intent"]
+        
+        tail = transcription[-DISPLAY_TAIL_CHARS:]
+        if len(transcription) > DISPLAY_TAIL_CHARS:
+            tail = "…" + tail
+        changed = []
+        for line, value in ((transcript_line, f"Transcript: {tail}"), (entities_line, f"Entities: {entities}, Intent: {intent}")):
+            if line.value != value:
+                line.value = value
+                changed.append(line)
+        if not changed:
+            return
+        if request_update:
+            request_update(*changed)
+        elif transcription_display.page:
+            transcription_display.update()
 
     transcription_display = Column(
-        [
-            Text(value="Waiting for transcription...", size=20, color="white"),
-            Text(value="Entities: {}, Intent: unknown", size=18, color="white"),  # Removed 'id'
-        ],
+        [transcript_line, entities_line],
         spacing=10,
     )
     return transcription_display, update_display
@@ -40,7 +70,7 @@ def create_file_section(file_picker, file_picker_result_handler, recorder_start_
         recorder_stop_handler: Callback to stop recording
         
     Returns:
-        Tuple of (section container, file path text, file name text, record button, stop button, select file button)
+        Tuple of (section container, file path text, file name text, record button, stop button, select file button, keep recording checkbox)
     """
     selected_file_name = ft.Text("No file selected", size=16)
     selected_file_path = ft.Text("")
@@ -68,6 +98,13 @@ def create_file_section(file_picker, file_picker_result_handler, recorder_start_
         visible=False,
     )
     
+    keep_recording_checkbox = ft.Checkbox(
+        label="Keep recording as file",
+        value=True,
+        tooltip="Stream recordings to disk; untick to keep them in memory (about 4 MB per minute, "
+                "moved to disk after 10 minutes)",
+    )
+    
     select_file_button = ft.ElevatedButton(
         "Select Audio File",
         icon=ft.Icons.UPLOAD_FILE,
@@ -88,6 +125,7 @@ def create_file_section(file_picker, file_picker_result_handler, recorder_start_
                 ft.VerticalDivider(width=10),
                 record_button,
                 stop_button,
+                keep_recording_checkbox,
                 selected_file_name,
             ]),
             format_hint
@@ -103,24 +141,19 @@ def create_file_section(file_picker, file_picker_result_handler, recorder_start_
     
     file_picker.on_result = handle_file_picker_result
     
-    return file_section, selected_file_path, selected_file_name, record_button, stop_button, select_file_button
+    return file_section, selected_file_path, selected_file_name, record_button, stop_button, select_file_button, keep_recording_checkbox
 
-def create_result_section():
+def create_result_section(request_update=None):
     """Create the transcription result section.
     
+    Args:
+        request_update: Callable marking controls for the next batched page
+            update (e.g. UpdateScheduler.request); updates directly if None
+    
     Returns:
-        Tuple of (section container, result text field, copy button, history button)
+        Tuple of (section container, transcript view, copy button, history button)
     """
-    result_text = ft.TextField(
-        multiline=True,
-        min_lines=10,
-        max_lines=20,
-        read_only=True,
-        border_color=ft.Colors.GREY_700,
-        focused_border_color=AppThemeLang.SECONDARY_COLOR,
-        text_size=16,
-        expand=True,
-    )
+    result_text = TranscriptView(request_update=request_update, text_size=16)
     
     copy_button = ft.IconButton(
         icon=ft.icons.COPY,
@@ -144,7 +177,7 @@ def create_result_section():
                     history_button,
                 ]),
             ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
-            result_text,
+            result_text.control,
         ]),
         expand=True,
     )
@@ -155,7 +188,7 @@ def create_controls_section():
     """Create the transcription controls section.
     
     Returns:
-        Tuple of (section container, button, progress ring, status text, vad_checkbox, translate_checkbox, live_button)
+        Tuple of (section container, button, progress ring, status text, vad_checkbox, translate_checkbox, live_button, pipeline_checkbox)
     """
     transcribe_button = ft.ElevatedButton(
         "Transcribe",
@@ -194,6 +227,12 @@ def create_controls_section():
         on_change=None,
     )
     
+    pipeline_checkbox = ft.Checkbox(
+        label="Transcribe while recording",
+        value=False,
+        tooltip="Decode finished 30-second windows during recording so results are ready right after stopping",
+    )
+    
     controls_section = create_section_container(
         ft.Column([
             ft.Row([
@@ -206,11 +245,12 @@ def create_controls_section():
             ft.Row([
                 vad_checkbox,
                 translate_checkbox,
+                pipeline_checkbox,
             ]),
         ])
     )
     
-    return controls_section, transcribe_button, progress_ring, status_text, vad_checkbox, translate_checkbox, live_button
+    return controls_section, transcribe_button, progress_ring, status_text, vad_checkbox, translate_checkbox, live_button, pipeline_checkbox
 
 def create_model_section(model_selector):
     """Create the model selection section.
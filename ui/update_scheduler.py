@@ -0,0 +1,114 @@
+"""Frame-rate limited, coalescing page updates for Flet."""
+import threading
+import time
+
+from logic.tracing import get_tracer
+
+
+class UpdateScheduler:
+    """Batches update requests from any thread into at most one push per interval.
+
+    Callbacks call `request(control, ...)` instead of `page.update()`. The
+    first request after a flush wakes a single flush thread, which waits
+    until `interval_ms` have passed since the previous push and then sends
+    every control marked dirty in the meantime in one `page.update()`.
+    A burst of segment or status events therefore costs one diff and one
+    websocket message per frame instead of one per event.
+    """
+
+    def __init__(self, page, interval_ms=50):
+        """Initialize the scheduler and start its flush thread.
+
+        Args:
+            page: Flet page to update
+            interval_ms: Minimum time between two pushes
+        """
+        self.page = page
+        self.interval = interval_ms / 1000
+        self.requests = 0
+        self.flushes = 0
+        self.max_batch = 0
+        self._dirty = []
+        self._full = False
+        self._pending = 0
+        self._last_flush = 0.0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="ui-updates", daemon=True)
+        self._thread.start()
+
+    def request(self, *controls):
+        """Mark controls as changed; without arguments the whole page is updated."""
+        with self._cond:
+            self.requests += 1
+            self._pending += 1
+            if controls:
+                for control in controls:
+                    if control is not None and not any(control is dirty for dirty in self._dirty):
+                        self._dirty.append(control)
+            else:
+                self._full = True
+            self._cond.notify()
+
+    def flush(self):
+        """Push pending changes now, from the calling thread."""
+        with self._cond:
+            batch = self._take()
+        self._push(*batch)
+
+    def close(self):
+        """Push what is pending and stop the flush thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def stats(self):
+        """Return request, push and coalescing counters."""
+        with self._cond:
+            return {
+                "requests": self.requests,
+                "flushes": self.flushes,
+                "coalesced": self.requests - self.flushes - self._pending,
+                "max_batch": self.max_batch,
+                "pending": self._pending,
+            }
+
+    def _take(self):
+        """Return (controls, full, count) and reset the pending state. Caller holds the lock."""
+        batch = (self._dirty, self._full, self._pending)
+        self._dirty = []
+        self._full = False
+        self._pending = 0
+        return batch
+
+    def _push(self, controls, full, count):
+        if not count or self.page is None:
+            return
+        try:
+            with get_tracer().span("ui.update", requests=count):
+                if full:
+                    self.page.update()
+                else:
+                    # Controls not yet added to the page cannot be updated on their own
+                    self.page.update(*[control for control in controls if control.page is not None])
+        except Exception as e:
+            print(f"UI update failed: {e}")
+        with self._cond:
+            self.flushes += 1
+            self.max_batch = max(self.max_batch, count)
+            self._last_flush = time.monotonic()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed and not self._pending:
+                    return
+                # Let more requests pile up until the next frame is due
+                due = self._last_flush + self.interval
+                while not self._closed and time.monotonic() < due:
+                    self._cond.wait(due - time.monotonic())
+                batch = self._take()
+            self._push(*batch)